@@ -0,0 +1,17 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException, status
+from app.config.settings import settings
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The admin API is disabled."
+        )
+    if x_admin_key is None or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin key."
+        )
@@ -0,0 +1,23 @@
+from fastapi import HTTPException, Request, status
+from app.config.settings import settings
+from app.services.admission import admission_controller
+
+
+async def require_admission(request: Request):
+    if not settings.ADMISSION_ENABLED:
+        return
+    enrollment_number = request.state.session.get("enrollment_number")
+    if enrollment_number is None:
+        # Anonymous requests are rejected by the routes themselves.
+        return
+    admission = admission_controller.check(enrollment_number)
+    if not admission.admitted:
+        if admission.position is None:
+            detail = "Registration is at capacity. Please try again shortly."
+        else:
+            detail = f"Registration is busy. You are number {admission.position} in the queue."
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(admission.retry_after)}
+        )
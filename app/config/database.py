@@ -1,12 +1,116 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import databases
-from .settings import settings
-
-
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-db = databases.Database(settings.DATABASE_URL)
\ No newline at end of file
+import sqlite3
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import databases
+from databases.core import Connection
+from .metrics import db_pool_checked_out, db_pool_wait_seconds
+from .settings import settings
+from .sql_instrumentation import install_engine_hooks, timed_rows, timed_statement
+
+try:
+    from asyncpg.exceptions import IntegrityConstraintViolationError
+except ImportError:  # Only installed for PostgreSQL.
+    IntegrityConstraintViolationError = None
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - started, "sync")
+
+
+class TimedConnection(Connection):
+    """Records how long acquiring a connection from the async pool took."""
+
+    async def __aenter__(self) -> "TimedConnection":
+        acquiring = self._connection_counter == 0
+        started = time.perf_counter()
+        await super().__aenter__()
+        if acquiring:
+            db_pool_wait_seconds.observe(time.perf_counter() - started, "async")
+            db_pool_checked_out.inc("async")
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await super().__aexit__(*args)
+        if self._connection_counter == 0:
+            db_pool_checked_out.dec("async")
+
+
+class InstrumentedDatabase(databases.Database):
+    """`databases.Database` that attributes each statement to the current request
+    and times connection checkouts."""
+
+    def connection(self) -> Connection:
+        if self._global_connection is not None:
+            return self._global_connection
+        if not self._connection:
+            self._connection = TimedConnection(self, self._backend)
+        return self._connection
+
+    async def fetch_all(self, query, values=None):
+        with timed_statement(query):
+            return await super().fetch_all(query, values)
+
+    async def fetch_one(self, query, values=None):
+        with timed_statement(query):
+            return await super().fetch_one(query, values)
+
+    async def fetch_val(self, query, values=None, column=0):
+        with timed_statement(query):
+            return await super().fetch_val(query, values, column=column)
+
+    async def execute(self, query, values=None):
+        with timed_statement(query):
+            return await super().execute(query, values)
+
+    async def execute_many(self, query, values):
+        with timed_statement(query):
+            return await super().execute_many(query, values)
+
+    async def iterate(self, query, values=None):
+        async for record in timed_rows(query, super().iterate(query, values)):
+            yield record
+
+
+def _engine_options(url: str) -> dict:
+    # In-memory SQLite needs its default single-connection pool.
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+event.listen(engine, "checkout", lambda *args: db_pool_checked_out.inc("sync"))
+event.listen(engine, "checkin", lambda *args: db_pool_checked_out.dec("sync"))
+
+# Unset: on in development only, since fingerprinting adds work to every statement.
+sql_instrumentation_enabled = (
+    settings.SQL_INSTRUMENTATION_ENABLED if settings.SQL_INSTRUMENTATION_ENABLED is not None
+    else settings.ENV == "development"
+)
+if sql_instrumentation_enabled:
+    install_engine_hooks(engine)
+
+db = InstrumentedDatabase(settings.DATABASE_URL)
+
+# `databases` raises the driver's own exceptions, so a constraint violation on
+# `db` is not a SQLAlchemy IntegrityError; catch this tuple instead.
+INTEGRITY_ERRORS = tuple(
+    error for error in (IntegrityError, sqlite3.IntegrityError, IntegrityConstraintViolationError)
+    if error is not None
+)
\ No newline at end of file
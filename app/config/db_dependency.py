@@ -1,8 +1,8 @@
-from app.config.database import SessionLocal
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
+from app.config.database import SessionLocal
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
         db.close()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Metrics are updated from the event loop without locks. A handful of them are
+# also touched from threadpool threads (sync DB pool waits), where a rare lost
+# increment is an acceptable price for keeping the hot path lock-free.
+#
+# Every process keeps its own values, and in prod mode a scrape reaches one
+# of several workers, so each sample carries a `worker` label (the pid).
+# Aggregate across workers with sum without (worker) (...).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str]) -> str:
+    pairs = [f'worker="{os.getpid()}"'] + [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A counter, or one read at scrape time when `collect` is given (see Gauge)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(values.items())
+            if value is not None
+        ]
+
+
+class Gauge(Metric):
+    """A settable gauge, or one computed at scrape time when `collect` is given.
+
+    `collect` returns {label values: value}, so state that already lives on
+    a service object doesn't have to be mirrored on every change.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def render(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(values.items())
+            if value is not None
+        ]
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.upper_bounds))
+        # Only the matching bucket is bumped; buckets are made cumulative at scrape time.
+        series.buckets[bisect_left(self.upper_bounds, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        bucket_names = self.labelnames + ("le",)
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for upper_bound, count in zip(self.upper_bounds, series.buckets):
+                cumulative += count
+                label_text = _format_labels(bucket_names, labels + (_format_value(upper_bound),))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{label_text} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.render()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+process_start_time = registry.gauge("process_start_time_seconds", "Start time of the process since unix epoch in seconds.")
+process_start_time.set(time.time())
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests served, by route template and status code.", ("method", "route", "status"))
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.", ("method", "route"))
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being served.", ("method",))
+
+db_pool_wait_seconds = registry.histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check a connection out of a pool.", ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+db_pool_checked_out = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of a pool.", ("pool",))
+
+otp_sends_total = registry.counter(
+    "otp_sends_total", "OTP send requests, by outcome of handing the SMS to the dispatcher.", ("result",))
+seat_reservations_total = registry.counter(
+    "seat_reservations_total", "Seat reservation attempts, by course type and outcome.", ("courses_type", "result"))
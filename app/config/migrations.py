@@ -0,0 +1,60 @@
+import importlib
+import pkgutil
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+import app.models
+from app.config.database import Base, engine
+from app.config.logger import logger
+
+
+def load_models() -> None:
+    # Tables only exist on Base.metadata once their model module is imported.
+    for module in pkgutil.iter_modules(app.models.__path__):
+        if module.name.endswith("_model"):
+            importlib.import_module(f"app.models.{module.name}")
+
+
+def run_migrations() -> None:
+    load_models()
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    missing_tables = [table for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+    if missing_tables:
+        Base.metadata.create_all(bind=engine, tables=missing_tables, checkfirst=False)
+        logger.info(f"Created tables: {', '.join(table.name for table in missing_tables)}")
+
+    # create_all() does not add columns to tables that already exist either;
+    # new columns need a server default (or to be nullable) for this to work.
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {engine.dialect.identifier_preparer.format_table(table)} "
+                    f"ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}"
+                )
+            logger.info(f"Added column {column.name} to {table.name}")
+
+    # create_all() does not add indexes to tables that already exist.
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables or not table.indexes:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=engine)
+                logger.info(f"Created index {index.name} on {table.name}")
+            except IntegrityError as e:
+                # A unique index over rows that already break it; the app still
+                # starts, but the duplicates have to be cleaned up by hand.
+                logger.error(f"Could not create unique index {index.name} on {table.name}: {e.orig}")
@@ -1,19 +1,75 @@
-from pydantic_settings import BaseSettings
-
-class Settings(BaseSettings):
-    FRONTEND_ORIGIN: str
-    SESSION_SECRET: str = "fallback-secret"
-    ENV: str = "development"
-    ENV_PORT: int = 10000
-    DATABASE_URL: str
-    SESSION_SECRET: str
-    TWILIO_ACCOUNT_SID: str
-    TWILIO_AUTH_TOKEN: str
-    TWILIO_PHONE_NUMBER: str
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"
-
+from typing import Optional
+from pydantic_settings import BaseSettings
+
+class Settings(BaseSettings):
+    FRONTEND_ORIGIN: str
+    SESSION_SECRET: str = "fallback-secret"
+    ENV: str = "development"
+    ENV_PORT: int = 10000
+    # Server processes on this host; prod mode sets it to its worker count.
+    WEB_CONCURRENCY: int = 1
+    DATABASE_URL: str
+    SESSION_SECRET: str
+    TWILIO_ACCOUNT_SID: str
+    TWILIO_AUTH_TOKEN: str
+    TWILIO_PHONE_NUMBER: str
+    SESSION_EXCLUDED_PATHS: str = "/,/health,/metrics,/docs,/openapi.json"
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    SESSION_CACHE_TTL_SECONDS: int = 60
+    SESSION_BACKEND: str = "database"
+    SESSION_SIGNING_KEY: str = ""
+    SESSION_DENYLIST_REFRESH_SECONDS: int = 5
+    SESSION_REAPER_INTERVAL_SECONDS: int = 300
+    SESSION_REAPER_BATCH_SIZE: int = 500
+    SESSION_REAPER_BATCH_PAUSE_SECONDS: float = 0.1
+    COURSE_CATALOG_TTL_SECONDS: int = 5
+    REGISTRATION_DATA_CACHE_MAX_ENTRIES: int = 10000
+    REGISTRATION_DATA_CACHE_TTL_SECONDS: int = 300
+    SEAT_STREAM_FLUSH_SECONDS: float = 1.0
+    SEAT_STREAM_MAX_PENDING_EVENTS: int = 30
+    SEAT_STREAM_KEEPALIVE_SECONDS: int = 15
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_MAX_ACTIVE: int = 200
+    ADMISSION_RATE_PER_SECOND: float = 10.0
+    ADMISSION_LEASE_SECONDS: int = 300
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: int = 60
+    ADMISSION_MAX_QUEUE: int = 50000
+    OTP_STORE: str = "memory"
+    OTP_TTL_SECONDS: int = 300
+    OTP_MAX_ATTEMPTS: int = 5
+    SMS_PROVIDER: str = "twilio"
+    SMS_QUEUE_SIZE: int = 1000
+    SMS_WORKERS: int = 4
+    SMS_MAX_RETRIES: int = 3
+    SMS_RETRY_BASE_SECONDS: float = 0.5
+    SMS_HTTP_POOL_SIZE: int = 20
+    SMS_HTTP_TIMEOUT_SECONDS: float = 10.0
+    BCRYPT_ROUNDS: int = 12
+    # 0: cpu_count // WEB_CONCURRENCY, so the pools of all workers together use each CPU once.
+    PASSWORD_POOL_WORKERS: int = 0
+    PASSWORD_MAX_PENDING: int = 64
+    # Unset: migrate on startup outside production. Prod mode migrates once in the supervisor instead.
+    AUTO_MIGRATE: Optional[bool] = None
+    # Unset: on only when ENV is development.
+    SQL_INSTRUMENTATION_ENABLED: Optional[bool] = None
+    SQL_N_PLUS_ONE_THRESHOLD: int = 3
+    METRICS_ENABLED: bool = True
+    ADMIN_API_KEY: str = ""
+    COURSE_IMPORT_BATCH_SIZE: int = 2000
+    COURSE_IMPORT_MAX_ERRORS: int = 1000
+    REGISTRATION_EXPORT_BATCH_SIZE: int = 1000
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    WAITLIST_HOLD_SECONDS: int = 900
+    WAITLIST_SWEEP_INTERVAL_SECONDS: int = 30
+    REGISTRATION_MODE: str = "first_come"
+    PREFERENCE_MAX_CHOICES: int = 10
+    ALLOTMENT_HOME_DEPARTMENT_QUOTA: float = 1.0
+    SEAT_RECONCILE_INTERVAL_SECONDS: int = 3600
+    SEAT_RECONCILE_BATCH_SIZE: int = 500
+    
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+        extra = "ignore"
+
 settings = Settings()
\ No newline at end of file
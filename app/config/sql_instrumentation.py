@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestSQLStats:
+    """Statements issued while serving a single request.
+
+    Statements are fingerprinted by SQLAlchemy's cache key, which ignores
+    bind parameter values, so the same query run with different values
+    counts as a repeat (the N+1 shape). SQL text is only rendered for the
+    statements that are reported as repeated.
+    """
+
+    __slots__ = ("statements", "db_seconds", "fingerprints", "examples")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+        self.examples: Dict[Hashable, object] = {}
+
+    def record(self, statement, seconds: float) -> None:
+        fingerprint = statement_fingerprint(statement)
+        self.statements += 1
+        self.db_seconds += seconds
+        self.fingerprints[fingerprint] += 1
+        self.examples.setdefault(fingerprint, statement)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [
+            (str(self.examples[fingerprint]), count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+current_sql_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("current_sql_stats", default=None)
+
+
+def statement_fingerprint(statement) -> Hashable:
+    if isinstance(statement, str):
+        return statement
+    # Memoized on the statement and far cheaper than compiling it to a string
+    cache_key = statement._generate_cache_key()
+    return cache_key.key if cache_key is not None else id(statement)
+
+
+@contextmanager
+def timed_statement(statement) -> Iterator[None]:
+    stats = current_sql_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.record(statement, time.perf_counter() - started)
+
+
+async def timed_rows(statement, rows: AsyncIterator) -> AsyncIterator:
+    """Yields from `rows`, timing only the fetches and not the consumer's work between rows."""
+    stats = current_sql_stats.get()
+    if stats is None:
+        async for row in rows:
+            yield row
+        return
+    seconds = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                row = await rows.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                seconds += time.perf_counter() - started
+            yield row
+    finally:
+        stats.record(statement, seconds)
+
+
+def install_engine_hooks(engine: Engine) -> None:
+    """Attributes statements run on the sync engine (threadpool work) to the
+    request whose context copied into the worker thread."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_sql_stats.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_sql_stats.get()
+        started = conn.info.get("query_started")
+        if stats is not None and started:
+            stats.record(statement, time.perf_counter() - started.pop())
+
+
+class RouteSQLStats:
+    __slots__ = ("requests", "statements", "db_seconds", "max_statements", "n_plus_one_requests")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.max_statements = 0
+        self.n_plus_one_requests = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2) if self.requests else 0.0,
+            "max_statements": self.max_statements,
+            "db_seconds": round(self.db_seconds, 4),
+            "avg_db_ms": round(self.db_seconds * 1000 / self.requests, 3) if self.requests else 0.0,
+            "n_plus_one_requests": self.n_plus_one_requests,
+        }
+
+
+class SQLStatsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteSQLStats] = {}
+
+    def observe(self, route: str, stats: RequestSQLStats, n_plus_one: bool) -> None:
+        with self._lock:
+            route_stats = self._routes.get(route)
+            if route_stats is None:
+                route_stats = self._routes[route] = RouteSQLStats()
+            route_stats.requests += 1
+            route_stats.statements += stats.statements
+            route_stats.db_seconds += stats.db_seconds
+            route_stats.max_statements = max(route_stats.max_statements, stats.statements)
+            if n_plus_one:
+                route_stats.n_plus_one_requests += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            routes = sorted(self._routes.items(), key=lambda item: item[1].db_seconds, reverse=True)
+            return {route: route_stats.snapshot() for route, route_stats in routes}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+sql_stats_registry = SQLStatsRegistry()
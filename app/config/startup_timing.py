@@ -0,0 +1,61 @@
+import time
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    """Records how long a worker takes from its first import of `app.main`
+    until it has served its first request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    def elapsed(self, name: str) -> Optional[float]:
+        return self.marks.get(name)
+
+    def report(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.marks.items()}
+
+
+startup_timer = StartupTimer()
+
+
+def probe_cold_start(path: str = "/health") -> Dict[str, float]:
+    """Imports the app, runs its lifespan and serves one request in-process.
+
+    Used by `python run.py startup-report`; talks ASGI directly so no HTTP
+    client or listening socket is needed.
+    """
+    import asyncio
+
+    async def probe() -> Dict[str, float]:
+        from app.main import app
+
+        async def receive() -> dict:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict) -> None:
+            pass
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        async with app.router.lifespan_context(app):
+            await app(scope, receive, send)
+        return startup_timer.report()
+
+    return asyncio.run(probe())
@@ -1,70 +1,105 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from fastapi.requests import Request
-from fastapi.middleware.cors import CORSMiddleware
-from app.middleware.db_session_middleware import DBSessionMiddleware
-# from starlette.middleware.sessions import SessionMiddleware
-from app.config.settings import settings
-from app.config.database import engine, Base
-from contextlib import asynccontextmanager
-from app.config.database import db, engine, Base
-from app.models.users_model import User, Registration
-from app.models.courses_model import RegisteredCourse, VOC, VAC
-from app.config.logger import logger
-from app.routes import register_routers
-from starlette.exceptions import HTTPException as StarletteHTTPException
-
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     # On startup
-#     Base.metadata.create_all(bind=engine)
-#     await db.connect()
-#     print("Database connection pool established.")
-#     yield
-#     # On shutdown
-#     await db.disconnect()
-#     print("Database connection pool closed.")
-
-
-# app = FastAPI(lifespan=lifespan)
-app = FastAPI()
-Base.metadata.create_all(bind=engine)
-
-allowed_origins = [origin.strip() for origin in settings.FRONTEND_ORIGIN.split(",")]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.add_middleware(DBSessionMiddleware)
-# app.add_middleware(
-#     SessionMiddleware,
-#     secret_key=settings.SESSION_SECRET,
-#     session_cookie="session",
-#     same_site="none" if settings.ENV == "production" else "lax",
-#     https_only=(settings.ENV == "production"),
-#     max_age=3600 * 24 * 7,
-# )
-
-register_routers(app)
-
-@app.get("/")
-async def read_root():
-    return {"message": "Welcome!"}
-
-@app.get("/health")
-async def health():
-    logger.info("Health check accessed")
-    return {"status": "healthy"}
-
-@app.exception_handler(StarletteHTTPException)
-async def custom_http_exception_handler(request: Request, exc: StarletteHTTPException):
-    logger.error(exc.detail)
-    return JSONResponse(
-        status_code=exc.status_code,
-        content={"message": exc.detail}
+from app.config.startup_timing import startup_timer
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.requests import Request
+from fastapi.middleware.cors import CORSMiddleware
+from app.middleware.db_session_middleware import DBSessionMiddleware
+from app.middleware.startup_timing_middleware import StartupTimingMiddleware
+from app.middleware.sql_instrumentation_middleware import SQLInstrumentationMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+# from starlette.middleware.sessions import SessionMiddleware
+from app.config.settings import settings
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from app.config.database import db, sql_instrumentation_enabled
+from app.config.migrations import run_migrations
+from app.config.logger import logger
+from app.services.seat_reconciler import seat_reconciler
+from app.services.session_reaper import session_reaper
+from app.services.seat_broadcaster import seat_broadcaster
+from app.services.sms import sms_dispatcher
+from app.services.waitlist import waitlist
+from app.services.passwords import password_service
+from app.services.metrics_exporter import render_metrics
+from app.routes import register_routers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+startup_timer.mark("imports")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    auto_migrate = settings.AUTO_MIGRATE if settings.AUTO_MIGRATE is not None else settings.ENV != "production"
+    if auto_migrate:
+        await run_in_threadpool(run_migrations)
+        startup_timer.mark("migrations")
+    await db.connect()
+    logger.info("Database connection pool established.")
+    session_reaper.start()
+    seat_broadcaster.start()
+    await sms_dispatcher.start()
+    password_service.start()
+    waitlist.start()
+    seat_reconciler.start()
+    startup_timer.mark("lifespan")
+    yield
+    await seat_reconciler.stop()
+    await waitlist.stop()
+    password_service.stop()
+    await sms_dispatcher.stop()
+    await seat_broadcaster.stop()
+    await session_reaper.stop()
+    await db.disconnect()
+    logger.info("Database connection pool closed.")
+
+
+app = FastAPI(lifespan=lifespan)
+
+allowed_origins = [origin.strip() for origin in settings.FRONTEND_ORIGIN.split(",")]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=allowed_origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.add_middleware(DBSessionMiddleware)
+if sql_instrumentation_enabled:
+    app.add_middleware(SQLInstrumentationMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(StartupTimingMiddleware)
+# app.add_middleware(
+#     SessionMiddleware,
+#     secret_key=settings.SESSION_SECRET,
+#     session_cookie="session",
+#     same_site="none" if settings.ENV == "production" else "lax",
+#     https_only=(settings.ENV == "production"),
+#     max_age=3600 * 24 * 7,
+# )
+
+register_routers(app)
+
+@app.get("/")
+async def read_root():
+    return {"message": "Welcome!"}
+
+@app.get("/health")
+async def health():
+    logger.info("Health check accessed")
+    return {"status": "healthy"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.exception_handler(StarletteHTTPException)
+async def custom_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    logger.error(exc.detail)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"message": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
\ No newline at end of file
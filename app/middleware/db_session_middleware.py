@@ -1,57 +1,76 @@
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
-from sqlalchemy.orm import Session
-from app.config.db_dependency import get_db
-from app.models.session_model import SessionData
-import uuid
-from datetime import datetime, timedelta, timezone
-from app.config.settings import settings
-
-class DBSessionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        db: Session = next(get_db())
-        session_key = request.cookies.get(settings.SESSION_SECRET)
-        
-        request.state.session = {}
-        initial_session_data = {}
-
-        if session_key:
-            session_record = db.query(SessionData).filter(
-                SessionData.session_key == session_key,
-                SessionData.expires > datetime.utcnow()
-            ).first()
-            if session_record:
-                request.state.session = session_record.data
-                initial_session_data = dict(session_record.data)
-
-        response = await call_next(request)
-
-        final_session_data = request.state.session
-        if final_session_data != initial_session_data:
-            
-            if not final_session_data and session_key:
-                db.query(SessionData).filter(SessionData.session_key == session_key).delete()
-                response.delete_cookie(settings.SESSION_SECRET)
-            
-            else:
-                new_key = session_key or str(uuid.uuid4())
-                IST = timezone(timedelta(hours=5, minutes=30))
-                expires = datetime.now(IST) + timedelta(days=1) # 7-day lifetime
-
-                db.merge(SessionData(session_key=new_key, data=final_session_data, expires=expires))
-                
-                response.set_cookie(
-                    key=settings.SESSION_SECRET,
-                    value=new_key,
-                    max_age=3600 * 24 * 7,  # 7 days
-                    httponly=False if settings.ENV == 'production' else True,
-                    samesite="none" if settings.ENV == 'production' else "lax",
-                    secure=True if settings.ENV == 'production' else False,
-                    path="/",
-                )
-            
-            db.commit()
-            
-        db.close()
-        return response
\ No newline at end of file
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterable, Optional
+from app.config.settings import settings
+from app.services.session_backends import create_session_backend
+
+
+class DBSessionMiddleware:
+    """Pure ASGI session middleware.
+
+    The configured session backend is only consulted when a cookie has to be
+    resolved or a changed session has to be persisted, and any database work
+    it does is finished before the downstream app (or the response) runs, so
+    no connection is pinned for the lifetime of a request.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[Iterable[str]] = None, backend=None) -> None:
+        self.app = app
+        if exclude_paths is None:
+            exclude_paths = settings.SESSION_EXCLUDED_PATHS.split(",")
+        self.exclude_paths = frozenset(path.strip() for path in exclude_paths if path.strip())
+        self.backend = backend or create_session_backend()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        if scope["method"] == "OPTIONS" or scope["path"] in self.exclude_paths:
+            state["session"] = {}
+            await self.app(scope, receive, send)
+            return
+
+        session_key = HTTPConnection(scope).cookies.get(settings.SESSION_SECRET)
+        initial_session_data = {}
+
+        if session_key:
+            session_data = await self.backend.load(session_key)
+            if session_data is not None:
+                initial_session_data = session_data
+        state["session"] = dict(initial_session_data)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                final_session_data = state.get("session") or {}
+                if final_session_data != initial_session_data:
+                    cookie_response = Response()
+
+                    if not final_session_data and session_key:
+                        await self.backend.delete(session_key)
+                        cookie_response.delete_cookie(settings.SESSION_SECRET)
+
+                    else:
+                        new_key = await self.backend.save(session_key, dict(final_session_data))
+
+                        cookie_response.set_cookie(
+                            key=settings.SESSION_SECRET,
+                            value=new_key,
+                            max_age=3600 * 24 * 7,  # 7 days
+                            httponly=False if settings.ENV == 'production' else True,
+                            samesite="none" if settings.ENV == 'production' else "lax",
+                            secure=True if settings.ENV == 'production' else False,
+                            path="/",
+                        )
+
+                    headers = MutableHeaders(scope=message)
+                    for name, value in cookie_response.raw_headers:
+                        if name == b"set-cookie":
+                            headers.append("set-cookie", value.decode("latin-1"))
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
\ No newline at end of file
@@ -0,0 +1,36 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.metrics import http_request_duration_seconds, http_requests_in_progress, http_requests_total
+
+
+class MetricsMiddleware:
+    """Request count, latency and in-flight gauges labelled by route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+        http_requests_in_progress.inc(method)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec(method)
+            # The router stores the matched route on the scope; label by its template, not the raw path
+            route = scope.get("route")
+            route_name = route.path if route is not None else "unmatched"
+            http_requests_total.inc(method, route_name, str(status_code))
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, route_name)
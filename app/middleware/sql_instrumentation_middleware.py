@@ -0,0 +1,50 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.logger import logger
+from app.config.settings import settings
+from app.config.sql_instrumentation import RequestSQLStats, current_sql_stats, sql_stats_registry
+
+
+class SQLInstrumentationMiddleware:
+    """Counts the statements and DB time of every request, per route.
+
+    Outside production the totals are also returned in a `Server-Timing`
+    header so they show up in the browser's network panel.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = settings.ENV != "production",
+                 n_plus_one_threshold: int = settings.SQL_N_PLUS_ONE_THRESHOLD) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats()
+        token = current_sql_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.server_timing:
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.statements} queries", app;dur={total_ms:.2f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_sql_stats.reset(token)
+            route = scope.get("route")
+            route_name = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            repeated = stats.repeated(self.n_plus_one_threshold)
+            for sql, count in repeated:
+                logger.warning(f"Possible N+1 on {route_name}: statement ran {count} times: {' '.join(sql.split())[:300]}")
+            sql_stats_registry.observe(route_name, stats, n_plus_one=bool(repeated))
@@ -0,0 +1,26 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config.logger import logger
+from app.config.startup_timing import startup_timer
+
+
+class StartupTimingMiddleware:
+    """Marks time-to-first-request on the startup timer and logs the cold-start report once."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.first_request_seen = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.first_request_seen or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and not self.first_request_seen:
+                self.first_request_seen = True
+                startup_timer.mark("first_request")
+                report = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in startup_timer.report().items())
+                logger.info(f"Cold start: {report}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text
+from app.config.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    expires = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime, Integer, text
+from app.config.database import Base
+
+class OTPCode(Base):
+    __tablename__ = 'otp_codes'
+
+    phone_number = Column(String, primary_key=True)
+    code = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    expires = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from app.config.database import Base
+
+class CoursePreference(Base):
+    __tablename__ = "course_preferences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_enrollment_number = Column(String, ForeignKey("users.enrollment_number"), nullable=False)
+    semester = Column(Integer, nullable=False, index=True)
+    courses_type = Column(String, nullable=False)
+    rank = Column(Integer, nullable=False)
+    course_code = Column(String, nullable=False)
+    submitted_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_course_preferences_student_rank", "user_enrollment_number", "semester", "courses_type", "rank", unique=True),
+    )
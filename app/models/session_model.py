@@ -1,10 +1,16 @@
-from sqlalchemy import Column, String, DateTime, JSON
-from app.config.database import Base
-from datetime import datetime
-
-class SessionData(Base):
-    __tablename__ = 'sessions'
-
-    session_key = Column(String, primary_key=True, index=True)
-    data = Column(JSON, default={})
-    expires = Column(DateTime)
\ No newline at end of file
+from sqlalchemy import Column, String, DateTime, JSON
+from app.config.database import Base
+from datetime import datetime
+
+class SessionData(Base):
+    __tablename__ = 'sessions'
+
+    session_key = Column(String, primary_key=True, index=True)
+    data = Column(JSON, default={})
+    expires = Column(DateTime, index=True)
+
+class RevokedSession(Base):
+    __tablename__ = 'revoked_sessions'
+
+    jti = Column(String, primary_key=True)
+    expires = Column(DateTime, index=True)
\ No newline at end of file
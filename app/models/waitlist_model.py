@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from app.config.database import Base
+
+class WaitlistEntry(Base):
+    __tablename__ = "waitlist_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_enrollment_number = Column(String, ForeignKey("users.enrollment_number"), nullable=False)
+    semester = Column(Integer, nullable=False)
+    courses_type = Column(String, nullable=False)
+    course_code = Column(String, nullable=False)
+    # waiting -> offered (a seat is held) -> claimed, or expired / left
+    status = Column(String, nullable=False, default="waiting")
+    joined_at = Column(DateTime, nullable=False)
+    hold_expires = Column(DateTime, nullable=True, index=True)
+
+    __table_args__ = (
+        Index("ix_waitlist_entries_student_course", "user_enrollment_number", "semester", "courses_type", "course_code", unique=True),
+        Index("ix_waitlist_entries_queue", "courses_type", "course_code", "semester", "status", "joined_at", "id"),
+    )
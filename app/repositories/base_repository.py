@@ -0,0 +1,19 @@
+from typing import Iterable, Optional
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config.database import db
+
+
+def record_to_dict(record) -> Optional[dict]:
+    if record is None:
+        return None
+    return {key: record[key] for key in record.keys()}
+
+
+def upsert(table: Table, values: dict, index_elements: Iterable[str], update_columns: Iterable[str]):
+    dialect_insert = postgresql.insert if db.url.dialect == "postgresql" else sqlite.insert
+    statement = dialect_insert(table).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={column: statement.excluded[column] for column in update_columns},
+    )
@@ -0,0 +1,87 @@
+from typing import Iterable, List
+from sqlalchemy import and_, case, or_, select, update
+from app.config.database import db
+from app.models.courses_model import VAC, VOC
+
+COURSE_TABLES = {
+    "VAC": VAC.__table__,
+    "VOC": VOC.__table__,
+}
+
+
+async def list_courses(courses_type: str, semester: int):
+    courses = COURSE_TABLES[courses_type]
+    return await db.fetch_all(
+        select(courses).where(courses.c.semester == semester).order_by(courses.c.course_code)
+    )
+
+
+async def reserve_seat(courses_type: str, course_code: str, semester: int):
+    # Single conditional increment: it only matches while capacity remains, so
+    # concurrent reservations can never push registered_seats past total_seats.
+    courses = COURSE_TABLES[courses_type]
+    return await db.fetch_one(
+        update(courses)
+        .where(
+            courses.c.course_code == course_code,
+            courses.c.semester == semester,
+            courses.c.registered_seats < courses.c.total_seats,
+        )
+        .values(registered_seats=courses.c.registered_seats + 1)
+        .returning(courses.c.course_code, courses.c.registered_seats, courses.c.total_seats)
+    )
+
+
+async def course_exists(courses_type: str, course_code: str, semester: int) -> bool:
+    courses = COURSE_TABLES[courses_type]
+    course_code = await db.fetch_val(
+        select(courses.c.course_code).where(courses.c.course_code == course_code, courses.c.semester == semester)
+    )
+    return course_code is not None
+
+
+async def existing_course_codes(courses_type: str, course_codes: Iterable[str], semester: int) -> List[str]:
+    courses = COURSE_TABLES[courses_type]
+    rows = await db.fetch_all(
+        select(courses.c.course_code).where(courses.c.course_code.in_(list(course_codes)), courses.c.semester == semester)
+    )
+    return [row["course_code"] for row in rows]
+
+
+async def get_course(courses_type: str, course_code: str, semester: int):
+    courses = COURSE_TABLES[courses_type]
+    return await db.fetch_one(
+        select(courses).where(courses.c.course_code == course_code, courses.c.semester == semester)
+    )
+
+
+async def release_seat(courses_type: str, course_code: str, semester: int):
+    courses = COURSE_TABLES[courses_type]
+    return await db.fetch_one(
+        update(courses)
+        .where(
+            courses.c.course_code == course_code,
+            courses.c.semester == semester,
+            courses.c.registered_seats > 0,
+        )
+        .values(registered_seats=courses.c.registered_seats - 1)
+        .returning(courses.c.course_code, courses.c.registered_seats, courses.c.total_seats)
+    )
+
+
+async def move_seat(courses_type: str, from_code: str, to_code: str, semester: int):
+    # Both counters change in one statement. The target row only matches while
+    # it has capacity, so the caller must check that it came back.
+    courses = COURSE_TABLES[courses_type]
+    return await db.fetch_all(
+        update(courses)
+        .where(
+            courses.c.semester == semester,
+            or_(
+                and_(courses.c.course_code == from_code, courses.c.registered_seats > 0),
+                and_(courses.c.course_code == to_code, courses.c.registered_seats < courses.c.total_seats),
+            ),
+        )
+        .values(registered_seats=courses.c.registered_seats + case((courses.c.course_code == to_code, 1), else_=-1))
+        .returning(courses.c.course_code, courses.c.registered_seats, courses.c.total_seats)
+    )
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config.database import db
+from app.models.idempotency_model import IdempotencyKey
+
+idempotency_keys = IdempotencyKey.__table__
+
+
+def key_for(enrollment_number: str, semester: int, client_key: Optional[str] = None) -> str:
+    # The semester is part of every key, so dropping one semester's courses
+    # can forget its keys without touching the student's other semesters.
+    base = f"{enrollment_number}:{semester}"
+    return f"{base}:key:{client_key}" if client_key else base
+
+
+async def claim_key(key: str, request_hash: str, status_code: int, response_body: str,
+                    now: datetime, expires: datetime) -> bool:
+    # Inserting is the claim: a live row with the same key means this request
+    # is a replay. Rows the reaper hasn't removed yet are reclaimed once expired.
+    dialect_insert = postgresql.insert if db.url.dialect == "postgresql" else sqlite.insert
+    values = {
+        "key": key,
+        "request_hash": request_hash,
+        "status_code": status_code,
+        "response_body": response_body,
+        "expires": expires,
+    }
+    statement = dialect_insert(idempotency_keys).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["key"],
+        set_={column: statement.excluded[column] for column in values if column != "key"},
+        where=idempotency_keys.c.expires <= now,
+    )
+    return await db.fetch_one(statement.returning(idempotency_keys.c.key)) is not None
+
+
+async def get_key(key: str):
+    return await db.fetch_one(select(idempotency_keys).where(idempotency_keys.c.key == key))
+
+
+async def delete_keys_for(enrollment_number: str, semester: int) -> None:
+    # The LIKE pattern is built here because startswith(autoescape=True) puts
+    # a literal '%' in the SQL text.
+    base = key_for(enrollment_number, semester)
+    prefix = f"{base}:".replace("/", "//").replace("%", "/%").replace("_", "/_")
+    await db.execute(delete(idempotency_keys).where(or_(
+        idempotency_keys.c.key == base,
+        idempotency_keys.c.key.like(prefix + "%", escape="/"),
+    )))
@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import delete, update
+from app.config.database import db
+from app.models.otp_model import OTPCode
+from app.repositories.base_repository import upsert
+
+otp_codes = OTPCode.__table__
+
+
+async def save_otp(phone_number: str, code: str, expires: datetime) -> None:
+    await db.execute(upsert(
+        otp_codes,
+        {"phone_number": phone_number, "code": code, "attempts": 0, "expires": expires},
+        index_elements=["phone_number"],
+        update_columns=["code", "attempts", "expires"],
+    ))
+
+
+async def record_attempt(phone_number: str, now: datetime, max_attempts: int):
+    # Counting the attempt and reading the code in one statement keeps the
+    # attempt limit exact even when guesses arrive on several workers at once.
+    return await db.fetch_one(
+        update(otp_codes)
+        .where(
+            otp_codes.c.phone_number == phone_number,
+            otp_codes.c.expires > now,
+            otp_codes.c.attempts < max_attempts,
+        )
+        .values(attempts=otp_codes.c.attempts + 1)
+        .returning(otp_codes.c.code, otp_codes.c.attempts)
+    )
+
+
+async def delete_otp(phone_number: str) -> None:
+    await db.execute(delete(otp_codes).where(otp_codes.c.phone_number == phone_number))
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import delete, insert, select
+from app.config.database import db
+from app.models.preference_model import CoursePreference
+
+course_preferences = CoursePreference.__table__
+
+
+async def replace_preferences(enrollment_number: str, semester: int, choices: Dict[str, List[str]], now: datetime) -> None:
+    """Replaces the student's ranked choices for `semester` ({courses_type: [course_code, ...]})."""
+    rows = [
+        {
+            "user_enrollment_number": enrollment_number,
+            "semester": semester,
+            "courses_type": courses_type,
+            "rank": rank,
+            "course_code": course_code,
+            "submitted_at": now,
+        }
+        for courses_type, course_codes in choices.items()
+        for rank, course_code in enumerate(course_codes, start=1)
+    ]
+    async with db.transaction():
+        await db.execute(
+            delete(course_preferences).where(
+                course_preferences.c.user_enrollment_number == enrollment_number,
+                course_preferences.c.semester == semester,
+            )
+        )
+        await db.execute_many(insert(course_preferences), rows)
+
+
+async def list_preferences(enrollment_number: str, semester: int):
+    return await db.fetch_all(
+        select(course_preferences)
+        .where(
+            course_preferences.c.user_enrollment_number == enrollment_number,
+            course_preferences.c.semester == semester,
+        )
+        .order_by(course_preferences.c.courses_type, course_preferences.c.rank)
+    )
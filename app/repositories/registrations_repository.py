@@ -0,0 +1,185 @@
+from typing import Optional
+from sqlalchemy import and_, delete, insert, select, update
+from app.config.database import db
+from app.models.users_model import Registration, User
+from app.models.courses_model import RegisteredCourse
+from app.repositories.courses_repository import COURSE_TABLES
+
+users = User.__table__
+registrations = Registration.__table__
+registered_courses = RegisteredCourse.__table__
+
+# What the API returns for a registration; `revision` is bookkeeping.
+registration_columns = [column for column in registrations.c if column.name != "revision"]
+next_revision = registrations.c.revision + 1
+
+
+async def _bump_revision(enrollment_number: str) -> None:
+    await db.execute(
+        update(registrations)
+        .where(registrations.c.user_enrollment_number == enrollment_number)
+        .values(revision=next_revision)
+    )
+
+
+async def get_registration(enrollment_number: str):
+    return await db.fetch_one(
+        select(*registration_columns).where(registrations.c.user_enrollment_number == enrollment_number)
+    )
+
+
+async def get_revision(enrollment_number: str) -> Optional[int]:
+    return await db.fetch_val(
+        select(registrations.c.revision).where(registrations.c.user_enrollment_number == enrollment_number)
+    )
+
+
+async def save_registration_details(enrollment_number: str, details: dict) -> None:
+    # Writing first takes the write lock at the start of the transaction; a
+    # read-then-write transaction can fail its lock upgrade on SQLite.
+    async with db.transaction():
+        updated = await db.fetch_one(
+            update(registrations)
+            .where(registrations.c.user_enrollment_number == enrollment_number)
+            .values(**details, revision=next_revision)
+            .returning(registrations.c.id)
+        )
+        if updated is None:
+            await db.execute(insert(registrations).values(
+                registration_status="Partial",
+                user_enrollment_number=enrollment_number,
+                **details,
+            ))
+
+
+async def set_registration_status(enrollment_number: str, registration_status: str) -> None:
+    await db.execute(
+        update(registrations)
+        .where(registrations.c.user_enrollment_number == enrollment_number)
+        .values(registration_status=registration_status, revision=next_revision)
+    )
+
+
+async def create_registered_course(enrollment_number: str, semester: int, vac: str, vac_papercode: str,
+                                   voc: str, voc_papercode: str) -> int:
+    course_id = await db.execute(insert(registered_courses).values(
+        user_enrollment_number=enrollment_number,
+        semester=semester,
+        vac=vac,
+        vac_papercode=vac_papercode,
+        voc=voc,
+        voc_papercode=voc_papercode,
+    ))
+    await _bump_revision(enrollment_number)
+    return course_id
+
+
+async def get_registered_course(enrollment_number: str, semester: int):
+    return await db.fetch_one(
+        select(registered_courses).where(
+            registered_courses.c.user_enrollment_number == enrollment_number,
+            registered_courses.c.semester == semester,
+        )
+    )
+
+
+async def change_course_choice(enrollment_number: str, semester: int, courses_type: str,
+                               from_code: str, to_code: str) -> bool:
+    # Matching on the current paper code makes concurrent changes by the same student fail instead of overlap.
+    courses = COURSE_TABLES[courses_type]
+    name_column, code_column = ("vac", "vac_papercode") if courses_type == "VAC" else ("voc", "voc_papercode")
+    course_name = select(courses.c.course_name).where(courses.c.course_code == to_code).scalar_subquery()
+    changed = await db.fetch_one(
+        update(registered_courses)
+        .where(
+            registered_courses.c.user_enrollment_number == enrollment_number,
+            registered_courses.c.semester == semester,
+            registered_courses.c[code_column] == from_code,
+        )
+        .values({name_column: course_name, code_column: to_code})
+        .returning(registered_courses.c.id)
+    ) is not None
+    if changed:
+        await _bump_revision(enrollment_number)
+    return changed
+
+
+async def delete_registered_course(enrollment_number: str, semester: int):
+    dropped = await db.fetch_one(
+        delete(registered_courses)
+        .where(
+            registered_courses.c.user_enrollment_number == enrollment_number,
+            registered_courses.c.semester == semester,
+        )
+        .returning(registered_courses.c.vac_papercode, registered_courses.c.voc_papercode)
+    )
+    if dropped is not None:
+        await _bump_revision(enrollment_number)
+    return dropped
+
+
+async def list_registered_courses(enrollment_number: str):
+    return await db.fetch_all(
+        select(registered_courses)
+        .where(registered_courses.c.user_enrollment_number == enrollment_number)
+        .order_by(registered_courses.c.semester.asc())
+    )
+
+
+async def get_registration_with_courses(enrollment_number: str):
+    # One row per registered semester, or a single row with NULL course columns.
+    return await db.fetch_all(
+        select(
+            *registration_columns,
+            registrations.c.revision,
+            users.c.phone_number.label("mobile_no"),
+            registered_courses.c.semester.label("course_semester"),
+            registered_courses.c.vac,
+            registered_courses.c.vac_papercode,
+            registered_courses.c.voc,
+            registered_courses.c.voc_papercode,
+        )
+        .select_from(
+            registrations
+            .join(users, users.c.enrollment_number == registrations.c.user_enrollment_number)
+            .outerjoin(
+                registered_courses,
+                registered_courses.c.user_enrollment_number == registrations.c.user_enrollment_number,
+            )
+        )
+        .where(registrations.c.user_enrollment_number == enrollment_number)
+        .order_by(registered_courses.c.semester.asc())
+    )
+
+
+def registration_export_query(semester: Optional[int] = None):
+    # Students without a course choice for the semester are still exported, with empty course columns.
+    course_join = registered_courses.c.user_enrollment_number == users.c.enrollment_number
+    if semester is not None:
+        course_join = and_(course_join, registered_courses.c.semester == semester)
+    return (
+        select(
+            users.c.enrollment_number,
+            users.c.phone_number.label("mobile_no"),
+            registrations.c.name,
+            registrations.c.faculty_number,
+            registrations.c.gender,
+            registrations.c.abc_id,
+            registrations.c.programme_name,
+            registrations.c.major_allotted_subject,
+            registrations.c.minor_allotted_subject,
+            registrations.c.generic_allotted_subject,
+            registrations.c.registration_status,
+            registered_courses.c.semester,
+            registered_courses.c.vac,
+            registered_courses.c.vac_papercode,
+            registered_courses.c.voc,
+            registered_courses.c.voc_papercode,
+        )
+        .select_from(
+            users
+            .join(registrations, registrations.c.user_enrollment_number == users.c.enrollment_number)
+            .outerjoin(registered_courses, course_join)
+        )
+        .order_by(users.c.enrollment_number, registered_courses.c.semester)
+    )
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from app.config.database import db
+from app.models.session_model import RevokedSession, SessionData
+from app.repositories.base_repository import upsert
+
+sessions = SessionData.__table__
+revoked_sessions = RevokedSession.__table__
+
+
+async def get_active_session(session_key: str, now: datetime):
+    return await db.fetch_one(
+        select(sessions.c.data, sessions.c.expires).where(
+            sessions.c.session_key == session_key,
+            sessions.c.expires > now,
+        )
+    )
+
+
+async def save_session(session_key: str, data: dict, expires: datetime) -> None:
+    await db.execute(upsert(
+        sessions,
+        {"session_key": session_key, "data": data, "expires": expires},
+        index_elements=["session_key"],
+        update_columns=["data", "expires"],
+    ))
+
+
+async def delete_session(session_key: str) -> None:
+    await db.execute(delete(sessions).where(sessions.c.session_key == session_key))
+
+
+async def list_revoked_session_ids(now: datetime) -> set:
+    rows = await db.fetch_all(select(revoked_sessions.c.jti).where(revoked_sessions.c.expires > now))
+    return {row["jti"] for row in rows}
+
+
+async def revoke_session(jti: str, expires: datetime) -> None:
+    await db.execute(upsert(
+        revoked_sessions,
+        {"jti": jti, "expires": expires},
+        index_elements=["jti"],
+        update_columns=["expires"],
+    ))
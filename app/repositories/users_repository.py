@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy import insert, select, update
+from app.config.database import db
+from app.models.users_model import User
+
+users = User.__table__
+
+
+async def get_user_by_enrollment(enrollment_number: str):
+    return await db.fetch_one(select(users).where(users.c.enrollment_number == enrollment_number))
+
+
+async def get_user_by_phone(phone_number: str):
+    return await db.fetch_one(select(users).where(users.c.phone_number == phone_number))
+
+
+async def get_phone_number(enrollment_number: str) -> Optional[str]:
+    return await db.fetch_val(
+        select(users.c.phone_number).where(users.c.enrollment_number == enrollment_number)
+    )
+
+
+async def create_user(enrollment_number: str, phone_number: str, hashed_password: str) -> int:
+    return await db.execute(insert(users).values(
+        enrollment_number=enrollment_number,
+        phone_number=phone_number,
+        hashed_password=hashed_password,
+    ))
+
+
+async def update_password_hash(enrollment_number: str, hashed_password: str) -> None:
+    await db.execute(
+        update(users).where(users.c.enrollment_number == enrollment_number).values(hashed_password=hashed_password)
+    )
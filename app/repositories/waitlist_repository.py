@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import and_, func, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config.database import db
+from app.models.waitlist_model import WaitlistEntry
+
+waitlist_entries = WaitlistEntry.__table__
+
+WAITING = "waiting"
+OFFERED = "offered"
+CLAIMED = "claimed"
+EXPIRED = "expired"
+LEFT = "left"
+ACTIVE_STATUSES = (WAITING, OFFERED)
+
+
+async def join(enrollment_number: str, semester: int, courses_type: str, course_code: str, now: datetime) -> bool:
+    # Re-joining after leaving, expiring or claiming goes to the back of the queue.
+    dialect_insert = postgresql.insert if db.url.dialect == "postgresql" else sqlite.insert
+    statement = dialect_insert(waitlist_entries).values(
+        user_enrollment_number=enrollment_number,
+        semester=semester,
+        courses_type=courses_type,
+        course_code=course_code,
+        status=WAITING,
+        joined_at=now,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_enrollment_number", "semester", "courses_type", "course_code"],
+        set_={"status": WAITING, "joined_at": now, "hold_expires": None},
+        # Spelled out: an expanding NOT IN isn't rendered inside ON CONFLICT ... WHERE.
+        where=and_(*(waitlist_entries.c.status != active_status for active_status in ACTIVE_STATUSES)),
+    )
+    return await db.fetch_one(statement.returning(waitlist_entries.c.id)) is not None
+
+
+async def get_entry(enrollment_number: str, semester: int, courses_type: str, course_code: str):
+    return await db.fetch_one(
+        select(waitlist_entries).where(
+            waitlist_entries.c.user_enrollment_number == enrollment_number,
+            waitlist_entries.c.semester == semester,
+            waitlist_entries.c.courses_type == courses_type,
+            waitlist_entries.c.course_code == course_code,
+        )
+    )
+
+
+async def get_active_entry(enrollment_number: str, semester: int, courses_type: str):
+    return await db.fetch_one(
+        select(waitlist_entries).where(
+            waitlist_entries.c.user_enrollment_number == enrollment_number,
+            waitlist_entries.c.semester == semester,
+            waitlist_entries.c.courses_type == courses_type,
+            waitlist_entries.c.status.in_(ACTIVE_STATUSES),
+        )
+    )
+
+
+async def list_active_entries(enrollment_number: str, semester: int, courses_types: Iterable[str]):
+    return await db.fetch_all(
+        select(waitlist_entries).where(
+            waitlist_entries.c.user_enrollment_number == enrollment_number,
+            waitlist_entries.c.semester == semester,
+            waitlist_entries.c.courses_type.in_(list(courses_types)),
+            waitlist_entries.c.status.in_(ACTIVE_STATUSES),
+        )
+    )
+
+
+async def list_entries(enrollment_number: str):
+    # Each waiting entry comes with the number of students ahead of it, in one query.
+    ahead = waitlist_entries.alias("ahead")
+    students_ahead = (
+        select(func.count())
+        .where(
+            ahead.c.courses_type == waitlist_entries.c.courses_type,
+            ahead.c.course_code == waitlist_entries.c.course_code,
+            ahead.c.semester == waitlist_entries.c.semester,
+            ahead.c.status == WAITING,
+            tuple_(ahead.c.joined_at, ahead.c.id) < tuple_(waitlist_entries.c.joined_at, waitlist_entries.c.id),
+        )
+        .scalar_subquery()
+    )
+    return await db.fetch_all(
+        select(waitlist_entries, students_ahead.label("students_ahead"))
+        .where(
+            waitlist_entries.c.user_enrollment_number == enrollment_number,
+            waitlist_entries.c.status.in_(ACTIVE_STATUSES),
+        )
+        .order_by(waitlist_entries.c.semester, waitlist_entries.c.courses_type)
+    )
+
+
+async def set_status(entry_id: int, from_status: str, to_status: str) -> bool:
+    return await db.fetch_one(
+        update(waitlist_entries)
+        .where(waitlist_entries.c.id == entry_id, waitlist_entries.c.status == from_status)
+        .values(status=to_status)
+        .returning(waitlist_entries.c.id)
+    ) is not None
+
+
+async def offer_next(courses_type: str, course_code: str, semester: int, hold_expires: datetime):
+    head = (
+        select(waitlist_entries.c.id)
+        .where(
+            waitlist_entries.c.courses_type == courses_type,
+            waitlist_entries.c.course_code == course_code,
+            waitlist_entries.c.semester == semester,
+            waitlist_entries.c.status == WAITING,
+        )
+        .order_by(waitlist_entries.c.joined_at, waitlist_entries.c.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return await db.fetch_one(
+        update(waitlist_entries)
+        .where(waitlist_entries.c.id == head, waitlist_entries.c.status == WAITING)
+        .values(status=OFFERED, hold_expires=hold_expires)
+        .returning(
+            waitlist_entries.c.id,
+            waitlist_entries.c.user_enrollment_number,
+            waitlist_entries.c.semester,
+            waitlist_entries.c.courses_type,
+            waitlist_entries.c.course_code,
+            waitlist_entries.c.hold_expires,
+        )
+    )
+
+
+async def claim_holds(enrollment_number: str, semester: int, course_codes: dict, now: datetime) -> List[str]:
+    """Marks unexpired holds on `course_codes` ({courses_type: course_code}) claimed; returns their types."""
+    if not course_codes:
+        return []
+    rows = await db.fetch_all(
+        update(waitlist_entries)
+        .where(
+            waitlist_entries.c.user_enrollment_number == enrollment_number,
+            waitlist_entries.c.semester == semester,
+            or_(*(
+                and_(waitlist_entries.c.courses_type == courses_type, waitlist_entries.c.course_code == course_code)
+                for courses_type, course_code in course_codes.items()
+            )),
+            waitlist_entries.c.status == OFFERED,
+            waitlist_entries.c.hold_expires > now,
+        )
+        .values(status=CLAIMED)
+        .returning(waitlist_entries.c.courses_type)
+    )
+    return [row["courses_type"] for row in rows]
+
+
+async def list_expired_holds(now: datetime, limit: int):
+    return await db.fetch_all(
+        select(waitlist_entries)
+        .where(waitlist_entries.c.status == OFFERED, waitlist_entries.c.hold_expires <= now)
+        .order_by(waitlist_entries.c.hold_expires)
+        .limit(limit)
+    )
+
+
+async def list_waiting_courses(semester: int, courses_type: str, course_codes: Optional[Iterable[str]] = None) -> List[str]:
+    query = select(waitlist_entries.c.course_code).distinct().where(
+        waitlist_entries.c.semester == semester,
+        waitlist_entries.c.courses_type == courses_type,
+        waitlist_entries.c.status == WAITING,
+    )
+    if course_codes is not None:
+        query = query.where(waitlist_entries.c.course_code.in_(list(course_codes)))
+    return [row["course_code"] for row in await db.fetch_all(query)]
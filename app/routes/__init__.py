@@ -1,10 +1,22 @@
-from fastapi import FastAPI
-from app.routes.auth import router as auth_router
-from app.routes.register import router as register_router
-from app.routes.courses import router as courses_router
-
-def register_routers(app: FastAPI):
-    app.include_router(auth_router, prefix="/v1/api/auth")
-    app.include_router(register_router, prefix="/v1/api/register")
-    app.include_router(courses_router, prefix="/v1/api/courses")
-
+from fastapi import Depends, FastAPI
+from app.config.admin_dependency import require_admin
+from app.config.admission_dependency import require_admission
+from app.config.settings import settings
+from app.routes.admin import router as admin_router
+from app.routes.admission import router as admission_router
+from app.routes.auth import router as auth_router
+from app.routes.register import router as register_router
+from app.routes.courses import router as courses_router
+from app.routes.diagnostics import router as diagnostics_router
+from app.routes.waitlist import router as waitlist_router
+
+def register_routers(app: FastAPI):
+    app.include_router(auth_router, prefix="/v1/api/auth")
+    app.include_router(register_router, prefix="/v1/api/register", dependencies=[Depends(require_admission)])
+    app.include_router(courses_router, prefix="/v1/api/courses", dependencies=[Depends(require_admission)])
+    app.include_router(admission_router, prefix="/v1/api/admission")
+    app.include_router(waitlist_router, prefix="/v1/api/waitlist")
+    app.include_router(admin_router, prefix="/v1/api/admin", dependencies=[Depends(require_admin)])
+    if settings.ENV != "production":
+        app.include_router(diagnostics_router, prefix="/v1/api/diagnostics")
+
@@ -0,0 +1,161 @@
+from fastapi import APIRouter, Request, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+from app.config.logger import logger
+from app.services import course_import, registration_export
+from app.services.allotment import ALLOTMENT_ORDERS, AllotmentError, run_allotment
+from app.services.course_catalog import course_catalog
+from app.services.seat_broadcaster import seat_broadcaster
+from app.services.seat_reconciler import seat_reconciler
+from app.services.waitlist import waitlist
+
+router = APIRouter()
+
+IMPORT_FORMATS = ("csv", "json")
+
+def detect_import_format(request: Request, upload_format: Optional[str]) -> str:
+    if upload_format:
+        if upload_format not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid format. Must be 'csv' or 'json'"
+            )
+        return upload_format
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if "json" in content_type:
+        return "json"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send text/csv, application/json or application/x-ndjson, or pass ?format="
+    )
+
+@router.post("/courses/import")
+async def import_course_catalog(
+    request: Request,
+    courses_type: str,
+    semester: int,
+    upload_format: Optional[str] = Query(default=None, alias="format"),
+):
+    try:
+        if courses_type not in ('VAC', 'VOC'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid courses_type. Must be 'VAC' or 'VOC'"
+            )
+        upload_format = detect_import_format(request, upload_format)
+        report = await course_import.import_courses(courses_type, semester, request.stream(), upload_format)
+
+        # Batches before an unreadable part of the upload are kept, so the report is returned either way.
+        return JSONResponse(
+            status_code=status.HTTP_200_OK if report.error is None else status.HTTP_400_BAD_REQUEST,
+            content=report.as_dict()
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during course import: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.get("/registrations/export")
+async def export_registrations(
+    semester: Optional[int] = None,
+    export_format: str = Query(default="csv", alias="format"),
+):
+    try:
+        if export_format not in registration_export.EXPORT_MEDIA_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid format. Must be 'csv' or 'ndjson'"
+            )
+        filename = f"registrations-semester-{semester if semester is not None else 'all'}.{export_format}"
+        return StreamingResponse(
+            registration_export.stream_registrations(semester, export_format),
+            media_type=registration_export.EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during registrations export: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.post("/waitlists/promote")
+async def promote_waitlists(courses_type: str, semester: int):
+    try:
+        if courses_type not in ('VAC', 'VOC'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid courses_type. Must be 'VAC' or 'VOC'"
+            )
+        promotions = await waitlist.fill_free_seats(semester, courses_type)
+        await waitlist.notify(promotions)
+
+        return {
+            "promoted": len(promotions),
+            "courses": sorted({promotion.course_code for promotion in promotions})
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during waitlist promotion: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.post("/allotments")
+async def run_preference_allotment(semester: int, dry_run: bool = False, order: str = "random", seed: Optional[int] = None):
+    try:
+        if order not in ALLOTMENT_ORDERS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid order. Must be 'random' or 'submitted'"
+            )
+        report = await run_in_threadpool(run_allotment, semester, dry_run, order, seed)
+        if not dry_run:
+            course_catalog.invalidate(semester=semester)
+
+        return report.as_dict()
+
+    except AllotmentError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during seat allotment: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.post("/seats/reconcile")
+async def reconcile_seat_counts(semester: Optional[int] = None, dry_run: bool = True):
+    try:
+        report = await seat_reconciler.run_once(dry_run=dry_run, semester=semester)
+        return report.as_dict()
+
+    except Exception as e:
+        logger.error(f"Error during seat reconciliation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.get("/seats-stream/connections")
+async def seat_stream_connections():
+    return seat_broadcaster.stats()
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Request, HTTPException, status
+from app.config.logger import logger
+from app.config.settings import settings
+from app.services.admission import admission_controller
+
+router = APIRouter()
+
+@router.get("/status")
+async def admission_status(request: Request):
+    if not request.state.session:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Cannot check the queue because you are not logged in."
+        )
+    enrollment_number = request.state.session.get("enrollment_number")
+    if enrollment_number is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Enrollment number not found in session."
+        )
+    if not settings.ADMISSION_ENABLED:
+        return {"admitted": True, "position": None, "retry_after": 0}
+
+    admission = admission_controller.check(enrollment_number)
+    if admission.admitted:
+        logger.info(f"User {enrollment_number} admitted to registration.")
+    return {
+        "admitted": admission.admitted,
+        "ticket": admission.ticket,
+        "position": admission.position,
+        "retry_after": admission.retry_after,
+        "queued": admission_controller.stats()["queued"],
+    }
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from app.config.sql_instrumentation import sql_stats_registry
+
+router = APIRouter()
+
+@router.get("/sql")
+async def sql_stats():
+    return sql_stats_registry.snapshot()
+
+@router.delete("/sql")
+async def reset_sql_stats():
+    sql_stats_registry.reset()
+    return {"success": True, "message": "SQL statistics reset."}
@@ -1,291 +1,408 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.config.logger import logger
-from app.schemas import user_schema
-from app.config.db_dependency import get_db
-from app.models.users_model import User, Registration
-from app.models.courses_model import RegisteredCourse, VAC, VOC
-
-router = APIRouter()
-
-@router.get("/")
-async def check_register():
-    logger.info("Registration route accessed")
-    return {
-        "status": "success",
-        "message": "User can register"
-    }
-
-@router.post("/user-details")
-async def add_user_details(user_details: user_schema.UserDetailsRequest, request: Request, db: Session = Depends(get_db)):
-    try:
-        if not request.state.session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Cannot register because you are not logged in."
-            )
-        session = request.state.session
-        enrollment_number = session.get("enrollment_number")
-        if enrollment_number is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Enrollment number not found in session."
-            )
-        
-        existing_registration = db.query(Registration).filter(
-            Registration.user_enrollment_number == enrollment_number
-        ).first()
-
-        if existing_registration:
-            existing_registration.name = user_details.name
-            existing_registration.abc_id = user_details.abc_id
-            existing_registration.faculty_number = user_details.faculty_number
-            existing_registration.gender = user_details.gender
-            existing_registration.programme_name = user_details.programme_name
-            existing_registration.major_allotted_subject = user_details.major_allotted_subject
-            existing_registration.minor_allotted_subject = user_details.minor_allotted_subject
-            existing_registration.generic_allotted_subject = user_details.generic_allotted_subject
-            db.commit()
-            db.refresh(existing_registration)
-        else:
-            details = Registration(
-                name=user_details.name,
-                registration_status="Partial",
-                abc_id=user_details.abc_id,
-                user_enrollment_number=enrollment_number,
-                faculty_number=user_details.faculty_number,
-                gender=user_details.gender,
-                programme_name=user_details.programme_name,
-                major_allotted_subject=user_details.major_allotted_subject,
-                minor_allotted_subject=user_details.minor_allotted_subject,
-                generic_allotted_subject=user_details.generic_allotted_subject
-            )
-            db.add(details)
-            db.commit()
-            db.refresh(details)
-        
-        return {
-            "success": True, 
-            "message": "Basic registration completed."
-        }
-    except HTTPException:
-        raise  
-    except Exception as e:
-        logger.error(f"Error during basic registration: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An internal server error occurred."
-        )
-
-@router.post("/user-courses")
-async def add_user_courses(user_courses: user_schema.UserCoursesRequest, request: Request, db: Session = Depends(get_db)):
-    try:
-        if not request.state.session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Cannot register because you are not logged in."
-            )
-        session = request.state.session
-        enrollment_number = session.get("enrollment_number")
-        if enrollment_number is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Enrollment number not found in session."
-            )
-        
-        course = RegisteredCourse(
-            user_enrollment_number=enrollment_number,
-            semester=user_courses.semester,
-            vac=user_courses.vac,
-            vac_papercode=user_courses.vac_papercode,
-            voc=user_courses.voc,
-            voc_papercode=user_courses.voc_papercode
-        )
-        
-        db.query(VAC).filter(
-            VAC.course_code == user_courses.vac_papercode,
-            VAC.semester == user_courses.semester
-        ).update({
-            VAC.registered_seats: VAC.registered_seats + 1
-        })
-        
-        db.query(VOC).filter(
-            VOC.course_code == user_courses.voc_papercode,
-            VOC.semester == user_courses.semester
-        ).update({
-            VOC.registered_seats: VOC.registered_seats + 1
-        })
-        
-        db.query(Registration).filter(
-            Registration.user_enrollment_number == enrollment_number
-        ).update({
-            Registration.registration_status: "Completed"
-        })
-
-        db.add(course)
-        db.commit()
-        db.refresh(course)
-        
-        return {
-            "success": True, 
-            "message": "Courses registration completed."
-        }
-    except HTTPException:
-        raise  
-    except Exception as e:
-        logger.error(f"Error during courses registration: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Type correct courses details"
-        )
-        
-@router.get("/check-registration")
-async def add_user_courses(request: Request, db: Session = Depends(get_db)):
-    try:
-        if not request.state.session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Cannot register because you are not logged in."
-            )
-        session = request.state.session
-        enrollment_number = session.get("enrollment_number")
-        
-        record = db.query(Registration).filter(Registration.user_enrollment_number == enrollment_number).first()
-
-        if record:
-            return {
-                "success": True, 
-                "message": record.registration_status
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Something went wrong, try again."
-            )
-    except HTTPException:
-        raise  
-    except Exception as e:
-        logger.error(f"Error during courses registration: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Something went wrong, try again."
-        )
-
-@router.post("/registration-data")
-async def add_user_details(request: Request, db: Session = Depends(get_db)):
-    try:
-        if not request.state.session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Cannot register because you are not logged in."
-            )
-        session = request.state.session
-        enrollment_number = session.get("enrollment_number")
-        if enrollment_number is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Enrollment number not found in session."
-            )
-            
-        user_registration_details = db.query(Registration).filter(
-            Registration.user_enrollment_number == enrollment_number
-        ).all()
-        
-        if not user_registration_details:
-            return {}
-        else:
-            return user_registration_details[0]
-        
-    except HTTPException:
-        raise  
-    except Exception as e:
-        logger.error(f"Error during courses registration: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Something went wrong, try again."
-        )
-
-@router.get("/complete-registration-data")
-async def add_user_details(request: Request, db: Session = Depends(get_db)):
-    try:
-        if not request.state.session:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Cannot register because you are not logged in."
-            )
-        session = request.state.session
-        enrollment_number = session.get("enrollment_number")
-        if enrollment_number is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Enrollment number not found in session."
-            )
-        
-        user_registration_details = db.query(Registration).filter(
-            Registration.user_enrollment_number == enrollment_number
-        ).first()
-        
-        phone_number = db.query(User.phone_number).filter(
-            User.enrollment_number == enrollment_number
-        ).scalar()
-        
-        registered_courses = db.query(RegisteredCourse).filter(
-            RegisteredCourse.user_enrollment_number == enrollment_number
-        ).order_by(RegisteredCourse.semester.asc()).all()
-
-        semester_I = 0
-        vac_I = vac_papercode_I = voc_I = voc_papercode_I = ""
-        semester_II = 0
-        vac_II = vac_papercode_II = voc_II = voc_papercode_II = ""
-
-        if len(registered_courses) > 0:
-            first = registered_courses[0]
-            semester_I = first.semester
-            vac_I = first.vac
-            vac_papercode_I = first.vac_papercode
-            voc_I = first.voc
-            voc_papercode_I = first.voc_papercode
-
-        if len(registered_courses) > 1:
-            second = registered_courses[1]
-            semester_II = second.semester
-            vac_II = second.vac
-            vac_papercode_II = second.vac_papercode
-            voc_II = second.voc
-            voc_papercode_II = second.voc_papercode
-        
-        response_data = {
-            "name": user_registration_details.name,
-            "id": user_registration_details.id,
-            "user_enrollment_number": user_registration_details.user_enrollment_number,
-            "mobile_no": phone_number,
-            "gender": user_registration_details.gender,
-            "programme_name": user_registration_details.programme_name,
-            "minor_allotted_subject": user_registration_details.minor_allotted_subject,
-            "abc_id": user_registration_details.abc_id,
-            "registration_status": user_registration_details.registration_status,
-            "faculty_number": user_registration_details.faculty_number,
-            "major_allotted_subject": user_registration_details.major_allotted_subject,
-            "generic_allotted_subject": user_registration_details.generic_allotted_subject,
-            "semester_I": semester_I,
-            "vac_I": vac_I,
-            "vac_papercode_I": vac_papercode_I,
-            "voc_I": voc_I,
-            "voc_papercode_I": voc_papercode_I,
-            "semester_II": semester_II,
-            "vac_II": vac_II,
-            "vac_papercode_II": vac_papercode_II,
-            "voc_II": voc_II,
-            "voc_papercode_II": voc_papercode_II,
-        }
-        # logger.info(response_data)
-        return response_data
-        
-    except HTTPException:
-        raise  
-    except Exception as e:
-        logger.error(f"Error during courses registration: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Something went wrong, try again."
+from datetime import datetime
+from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import JSONResponse, Response
+from app.config.logger import logger
+from app.config.settings import settings
+from app.schemas import user_schema
+from app.repositories import courses_repository, preferences_repository, registrations_repository
+from app.repositories.base_repository import record_to_dict
+from app.services import course_registration, seat_reservation
+from app.services.admission import admission_controller
+from app.services.course_registration import AlreadyRegisteredError, IdempotencyKeyReusedError, NotRegisteredError
+from app.services.registration_data import etag_matches, registration_data
+from app.services.seat_reservation import CourseFullError, CourseNotFoundError
+from app.services.waitlist import waitlist
+
+router = APIRouter()
+
+@router.get("/")
+async def check_register():
+    logger.info("Registration route accessed")
+    return {
+        "status": "success",
+        "message": "User can register"
+    }
+
+@router.post("/user-details")
+async def add_user_details(user_details: user_schema.UserDetailsRequest, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot register because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+        
+        await registrations_repository.save_registration_details(enrollment_number, user_details.model_dump())
+        
+        return {
+            "success": True, 
+            "message": "Basic registration completed."
+        }
+    except HTTPException:
+        raise  
+    except Exception as e:
+        logger.error(f"Error during basic registration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An internal server error occurred."
+        )
+
+@router.post("/user-courses")
+async def add_user_courses(user_courses: user_schema.UserCoursesRequest, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot register because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+        
+        if settings.REGISTRATION_MODE == "preferences":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Courses are allotted by preference this term; submit your preferences instead."
+            )
+
+        client_key = request.headers.get(course_registration.IDEMPOTENCY_HEADER)
+        if client_key is not None and not 0 < len(client_key) <= course_registration.MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{course_registration.IDEMPOTENCY_HEADER} must be 1 to {course_registration.MAX_IDEMPOTENCY_KEY_LENGTH} characters."
+            )
+
+        result = await course_registration.register_courses(enrollment_number, user_courses, client_key)
+        if not result.replayed:
+            seat_reservation.announce_seat_counts(user_courses.semester, result.seat_counts)
+            for courses_type, seat_count in result.waitlist_change.seat_counts:
+                seat_reservation.announce_seat_count(user_courses.semester, courses_type, seat_count)
+            await waitlist.notify(result.waitlist_change.promotions)
+        admission_controller.release(enrollment_number)
+
+        return JSONResponse(
+            status_code=result.status_code,
+            content=result.body,
+            headers={"Idempotent-Replayed": "true"} if result.replayed else None
+        )
+    except AlreadyRegisteredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message
+        )
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.message
+        )
+    except CourseFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message
+        )
+    except CourseNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except HTTPException:
+        raise  
+    except Exception as e:
+        logger.error(f"Error during courses registration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Type correct courses details"
+        )
+        
+@router.post("/preferences")
+async def submit_preferences(preferences: user_schema.PreferencesRequest, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot submit preferences because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+        if settings.REGISTRATION_MODE != "preferences":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Preference submission is not open."
+            )
+
+        choices = {"VAC": preferences.vac, "VOC": preferences.voc}
+        for courses_type, course_codes in choices.items():
+            if not 0 < len(course_codes) <= settings.PREFERENCE_MAX_CHOICES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Rank 1 to {settings.PREFERENCE_MAX_CHOICES} {courses_type} courses."
+                )
+            if len(set(course_codes)) != len(course_codes):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Each {courses_type} course can only be ranked once."
+                )
+            existing = await courses_repository.existing_course_codes(courses_type, course_codes, preferences.semester)
+            unknown = [course_code for course_code in course_codes if course_code not in existing]
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{courses_type} course {unknown[0]} does not exist for semester {preferences.semester}."
+                )
+
+        await preferences_repository.replace_preferences(enrollment_number, preferences.semester, choices, datetime.utcnow())
+
+        return {
+            "success": True,
+            "message": "Preferences saved."
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error while saving preferences: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.get("/preferences")
+async def get_preferences(semester: int, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot fetch preferences because you are not logged in."
+            )
+        enrollment_number = request.state.session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+
+        rows = await preferences_repository.list_preferences(enrollment_number, semester)
+        return {
+            "semester": semester,
+            "vac": [row["course_code"] for row in rows if row["courses_type"] == "VAC"],
+            "voc": [row["course_code"] for row in rows if row["courses_type"] == "VOC"],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error while fetching preferences: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.post("/swap-course")
+async def swap_user_course(swap_data: user_schema.SwapCourseRequest, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot change courses because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+        if swap_data.courses_type not in ('VAC', 'VOC'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid courses_type. Must be 'VAC' or 'VOC'"
+            )
+
+        change = await course_registration.swap_course(
+            enrollment_number, swap_data.semester, swap_data.courses_type, swap_data.course_code
+        )
+        for courses_type, seat_count in change.seat_counts:
+            seat_reservation.announce_seat_count(swap_data.semester, courses_type, seat_count)
+        await waitlist.notify(change.promotions)
+
+        return {
+            "success": True,
+            "message": f"{swap_data.courses_type} course changed to {swap_data.course_code}."
+        }
+    except NotRegisteredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+    except CourseFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message
+        )
+    except CourseNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during course swap: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.post("/drop-courses")
+async def drop_user_courses(drop_data: user_schema.DropCoursesRequest, request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot change courses because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+
+        change = await course_registration.drop_courses(enrollment_number, drop_data.semester)
+        for courses_type, seat_count in change.seat_counts:
+            seat_reservation.announce_seat_count(drop_data.semester, courses_type, seat_count)
+        await waitlist.notify(change.promotions)
+
+        return {
+            "success": True,
+            "message": f"Courses for semester {drop_data.semester} dropped."
+        }
+    except NotRegisteredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during course drop: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.get("/check-registration")
+async def add_user_courses(request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot register because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        
+        record = await registrations_repository.get_registration(enrollment_number)
+
+        if record:
+            return {
+                "success": True, 
+                "message": record.registration_status
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Something went wrong, try again."
+            )
+    except HTTPException:
+        raise  
+    except Exception as e:
+        logger.error(f"Error during courses registration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.post("/registration-data")
+async def add_user_details(request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot register because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+            
+        user_registration_details = await registrations_repository.get_registration(enrollment_number)
+        
+        if not user_registration_details:
+            return {}
+        else:
+            return record_to_dict(user_registration_details)
+        
+    except HTTPException:
+        raise  
+    except Exception as e:
+        logger.error(f"Error during courses registration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.get("/complete-registration-data")
+async def add_user_details(request: Request):
+    try:
+        if not request.state.session:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Cannot register because you are not logged in."
+            )
+        session = request.state.session
+        enrollment_number = session.get("enrollment_number")
+        if enrollment_number is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Enrollment number not found in session."
+            )
+        
+        rendered = await registration_data.get(enrollment_number)
+        if rendered is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Registration details not found."
+            )
+
+        headers = {"ETag": rendered.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=rendered.body, media_type="application/json", headers=headers)
+        
+    except HTTPException:
+        raise  
+    except Exception as e:
+        logger.error(f"Error during courses registration: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
         )
\ No newline at end of file
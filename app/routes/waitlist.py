@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Request, HTTPException, status
+from app.config.logger import logger
+from app.schemas import course_schema
+from app.repositories import waitlist_repository
+from app.services.seat_reservation import CourseNotFoundError
+from app.services.waitlist import WaitlistError, waitlist
+
+router = APIRouter()
+
+def session_enrollment_number(request: Request) -> str:
+    if not request.state.session:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Cannot use the waitlist because you are not logged in."
+        )
+    enrollment_number = request.state.session.get("enrollment_number")
+    if enrollment_number is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Enrollment number not found in session."
+        )
+    return enrollment_number
+
+def check_courses_type(courses_type: str) -> None:
+    if courses_type not in ('VAC', 'VOC'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid courses_type. Must be 'VAC' or 'VOC'"
+        )
+
+@router.post("/join", status_code=status.HTTP_201_CREATED)
+async def join_waitlist(request: Request, waitlist_data: course_schema.WaitlistRequest):
+    try:
+        enrollment_number = session_enrollment_number(request)
+        check_courses_type(waitlist_data.courses_type)
+        await waitlist.join(enrollment_number, waitlist_data.semester, waitlist_data.courses_type, waitlist_data.course_code)
+
+        return {
+            "success": True,
+            "message": f"Joined the waitlist for {waitlist_data.course_code}."
+        }
+    except CourseNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except WaitlistError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error while joining waitlist: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.post("/leave")
+async def leave_waitlist(request: Request, waitlist_data: course_schema.WaitlistRequest):
+    try:
+        enrollment_number = session_enrollment_number(request)
+        check_courses_type(waitlist_data.courses_type)
+        promotions = await waitlist.leave(enrollment_number, waitlist_data.semester, waitlist_data.courses_type, waitlist_data.course_code)
+        await waitlist.notify(promotions)
+
+        return {
+            "success": True,
+            "message": f"Left the waitlist for {waitlist_data.course_code}."
+        }
+    except WaitlistError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error while leaving waitlist: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
+
+@router.get("/status")
+async def waitlist_status(request: Request):
+    try:
+        enrollment_number = session_enrollment_number(request)
+        entries = await waitlist_repository.list_entries(enrollment_number)
+
+        return [
+            {
+                "semester": entry["semester"],
+                "courses_type": entry["courses_type"],
+                "course_code": entry["course_code"],
+                "status": entry["status"],
+                "position": entry["students_ahead"] + 1 if entry["status"] == waitlist_repository.WAITING else None,
+                "hold_expires": entry["hold_expires"].isoformat() + "Z" if entry["hold_expires"] else None,
+            }
+            for entry in entries
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error while fetching waitlist status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong, try again."
+        )
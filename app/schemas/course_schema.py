@@ -1,5 +1,21 @@
-from pydantic import BaseModel
-
-class CoursesListRequest(BaseModel):
-    semester: int
-    courses_type: str
\ No newline at end of file
+from typing import Optional
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+class CoursesListRequest(BaseModel):
+    semester: int
+    courses_type: str
+
+class WaitlistRequest(BaseModel):
+    semester: int
+    courses_type: str
+    course_code: str
+
+class CourseImportRow(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    # Also accepts the field names used by courses-list, so an export can be re-imported.
+    course_code: str = Field(min_length=1, max_length=32, validation_alias=AliasChoices("course_code", "papercode"))
+    course_name: str = Field(min_length=1, validation_alias=AliasChoices("course_name", "name"))
+    department_name: str = Field(min_length=1)
+    total_seats: int = Field(ge=0)
+    semester: Optional[int] = None
\ No newline at end of file
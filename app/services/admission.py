@@ -0,0 +1,157 @@
+import bisect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.config.settings import settings
+
+
+@dataclass
+class AdmissionStatus:
+    admitted: bool
+    ticket: Optional[int] = None
+    position: Optional[int] = None
+    retry_after: int = 0
+
+
+class AdmissionController:
+    """Virtual waiting room in front of the registration routes.
+
+    At most `max_active` registrants hold an admission lease at a time and
+    new leases are handed out no faster than `rate_per_second` (token
+    bucket), everyone else waits in a FIFO queue keyed by enrollment number.
+    Leases are extended on every request and expire after `lease_seconds`
+    of inactivity; queued clients must poll at least every
+    `queue_timeout_seconds` to keep their place. Everything is in memory,
+    so each worker runs its own room sized for its share of the DB pool.
+
+    Leases and queue polls are kept in last-touched order, which is also
+    expiry order, so expiring only ever looks at the oldest entries and a
+    request costs O(1) amortized however long the queue is.
+    """
+
+    def __init__(self, max_active: int, rate_per_second: float, lease_seconds: float,
+                 queue_timeout_seconds: float, max_queue: int) -> None:
+        self.max_active = max_active
+        self.rate_per_second = rate_per_second
+        self.lease_seconds = lease_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_queue = max_queue
+        # key -> lease expiry, oldest first
+        self._active: "OrderedDict[str, float]" = OrderedDict()
+        # key -> ticket, in ticket (admission) order
+        self._queue: "OrderedDict[str, int]" = OrderedDict()
+        # key -> last poll, oldest first
+        self._queue_seen: "OrderedDict[str, float]" = OrderedDict()
+        self._next_ticket = 1
+        # Tickets are admitted in order, so everything up to this ticket has left the queue...
+        self._admitted_through = 0
+        # ...plus these later tickets that left early (sorted), which positions must skip.
+        self._departed: List[int] = []
+        self._bucket = float(max(rate_per_second, 1.0))
+        self._bucket_updated = time.monotonic()
+        self.admitted_total = 0
+        self.expired_leases = 0
+        self.abandoned = 0
+        self.rejected = 0
+
+    def _expire(self, now: float) -> None:
+        while self._active:
+            key, expires = next(iter(self._active.items()))
+            if expires > now:
+                break
+            del self._active[key]
+            self.expired_leases += 1
+        while self._queue_seen:
+            key, last_seen = next(iter(self._queue_seen.items()))
+            if now - last_seen <= self.queue_timeout_seconds:
+                break
+            self._leave_queue(key)
+            self.abandoned += 1
+
+    def _leave_queue(self, key: str) -> None:
+        ticket = self._queue.pop(key, None)
+        self._queue_seen.pop(key, None)
+        if ticket is not None and ticket > self._admitted_through:
+            bisect.insort(self._departed, ticket)
+
+    def _refill(self, now: float) -> None:
+        capacity = max(self.rate_per_second, 1.0)
+        self._bucket = min(capacity, self._bucket + (now - self._bucket_updated) * self.rate_per_second)
+        self._bucket_updated = now
+
+    def _admit_from_queue(self, now: float) -> None:
+        self._refill(now)
+        while self._queue and len(self._active) < self.max_active and self._bucket >= 1:
+            key, ticket = self._queue.popitem(last=False)
+            del self._queue_seen[key]
+            self._active[key] = now + self.lease_seconds
+            self._admitted_through = ticket
+            self._bucket -= 1
+            self.admitted_total += 1
+        passed = bisect.bisect_right(self._departed, self._admitted_through)
+        if passed:
+            del self._departed[:passed]
+
+    def _position(self, ticket: int) -> int:
+        return ticket - self._admitted_through - bisect.bisect_left(self._departed, ticket)
+
+    def _retry_after(self, position: int) -> int:
+        return max(1, min(int(position / max(self.rate_per_second, 0.1)), int(self.queue_timeout_seconds / 2)))
+
+    def check(self, key: str) -> AdmissionStatus:
+        now = time.monotonic()
+        self._expire(now)
+
+        if key in self._active:
+            self._active[key] = now + self.lease_seconds
+            self._active.move_to_end(key)
+            return AdmissionStatus(admitted=True)
+
+        ticket = self._queue.get(key)
+        if ticket is None:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                return AdmissionStatus(admitted=False, retry_after=int(self.queue_timeout_seconds))
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._queue[key] = ticket
+        self._queue_seen[key] = now
+        self._queue_seen.move_to_end(key)
+
+        self._admit_from_queue(now)
+        if key in self._active:
+            return AdmissionStatus(admitted=True, ticket=ticket)
+
+        position = self._position(ticket)
+        return AdmissionStatus(
+            admitted=False,
+            ticket=ticket,
+            position=position,
+            retry_after=self._retry_after(position),
+        )
+
+    def release(self, key: str) -> None:
+        self._active.pop(key, None)
+        self._leave_queue(key)
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._active),
+            "queued": len(self._queue),
+            "max_active": self.max_active,
+            "admitted_total": self.admitted_total,
+            "expired_leases": self.expired_leases,
+            "abandoned": self.abandoned,
+            "rejected": self.rejected,
+        }
+
+
+admission_controller = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE,
+    rate_per_second=settings.ADMISSION_RATE_PER_SECOND,
+    lease_seconds=settings.ADMISSION_LEASE_SECONDS,
+    queue_timeout_seconds=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+)
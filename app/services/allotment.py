@@ -0,0 +1,285 @@
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config.database import engine
+from app.config.logger import logger
+from app.config.settings import settings
+from app.models.courses_model import RegisteredCourse
+from app.models.preference_model import CoursePreference
+from app.models.users_model import Registration
+from app.repositories.courses_repository import COURSE_TABLES
+
+COURSE_TYPES = ("VAC", "VOC")
+ALLOTMENT_ORDERS = ("random", "submitted")
+WRITE_CHUNK_SIZE = 500
+
+preferences = CoursePreference.__table__
+registered_courses = RegisteredCourse.__table__
+registrations = Registration.__table__
+
+
+class AllotmentError(Exception):
+    pass
+
+
+@dataclass
+class CourseSlots:
+    codes: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    departments: List[str] = field(default_factory=list)
+    free: List[int] = field(default_factory=list)
+    home_free: List[int] = field(default_factory=list)
+    index: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class AllotmentReport:
+    semester: int
+    dry_run: bool
+    order: str
+    seed: Optional[int]
+    home_department_quota: float
+    students: int = 0
+    already_registered: int = 0
+    allotted: int = 0
+    unallotted: int = 0
+    first_choice: Dict[str, int] = field(default_factory=dict)
+    mean_rank: Dict[str, float] = field(default_factory=dict)
+    rank_histogram: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    seats_left: Dict[str, int] = field(default_factory=dict)
+    load_seconds: float = 0.0
+    compute_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _department_key(name: Optional[str]) -> str:
+    return (name or "").strip().lower()
+
+
+def _load(connection, semester: int, home_department_quota: float):
+    courses: Dict[str, CourseSlots] = {}
+    for courses_type in COURSE_TYPES:
+        table = COURSE_TABLES[courses_type]
+        slots = CourseSlots()
+        rows = connection.execute(
+            select(table.c.course_code, table.c.course_name, table.c.department_name,
+                   table.c.total_seats, table.c.registered_seats)
+            .where(table.c.semester == semester)
+            .order_by(table.c.course_code)
+        )
+        for code, name, department, total_seats, registered_seats in rows:
+            free = max(0, (total_seats or 0) - (registered_seats or 0))
+            slots.index[code] = len(slots.codes)
+            slots.codes.append(code)
+            slots.names.append(name)
+            slots.departments.append(_department_key(department))
+            slots.free.append(free)
+            slots.home_free.append(math.floor(free * home_department_quota))
+        courses[courses_type] = slots
+
+    # enrollment_number -> {courses_type: [course index, ...] in rank order}
+    choices: Dict[str, Dict[str, List[int]]] = {}
+    submitted: Dict[str, object] = {}
+    rows = connection.execute(
+        select(preferences.c.user_enrollment_number, preferences.c.courses_type,
+               preferences.c.course_code, preferences.c.submitted_at)
+        .where(preferences.c.semester == semester)
+        .order_by(preferences.c.user_enrollment_number, preferences.c.courses_type, preferences.c.rank)
+    )
+    for enrollment_number, courses_type, course_code, submitted_at in rows:
+        slots = courses.get(courses_type)
+        student = choices.setdefault(enrollment_number, {courses_type: [] for courses_type in COURSE_TYPES})
+        submitted[enrollment_number] = submitted_at
+        # A course removed from the catalog since submission is skipped, not an error.
+        if slots is not None and course_code in slots.index:
+            student[courses_type].append(slots.index[course_code])
+
+    registered = set(connection.execute(
+        select(registered_courses.c.user_enrollment_number).where(registered_courses.c.semester == semester)
+    ).scalars())
+
+    majors: Dict[str, str] = {}
+    if home_department_quota < 1:
+        majors = {
+            enrollment_number: _department_key(major)
+            for enrollment_number, major in connection.execute(
+                select(registrations.c.user_enrollment_number, registrations.c.major_allotted_subject)
+            )
+        }
+    return courses, choices, submitted, registered, majors
+
+
+def _allot(order: List[str], choices, courses: Dict[str, CourseSlots], majors: Dict[str, str], report: AllotmentReport):
+    """Serial dictatorship: each student in turn gets their best VAC and VOC that still have a seat.
+
+    A student needs one course of each type; if either runs out, the
+    student gets neither and no seat is used.
+
+    This is a plain Python loop over int lists rather than vectorized numpy:
+    each student's pick depends on the seats left by everyone before them,
+    so the work is inherently sequential, and numpy isn't a dependency.
+    It handles tens of thousands of students in well under a second.
+    """
+    assignments: List[Tuple[str, Dict[str, Tuple[int, int]]]] = []
+    histograms = {courses_type: Counter() for courses_type in COURSE_TYPES}
+    for enrollment_number in order:
+        home = majors.get(enrollment_number)
+        picks = {}
+        for courses_type in COURSE_TYPES:
+            slots = courses[courses_type]
+            for rank, course in enumerate(choices[enrollment_number][courses_type], start=1):
+                if slots.free[course] <= 0:
+                    continue
+                if home and slots.departments[course] == home and slots.home_free[course] <= 0:
+                    continue
+                picks[courses_type] = (rank, course)
+                break
+            else:
+                break
+        if len(picks) < len(COURSE_TYPES):
+            report.unallotted += 1
+            continue
+        for courses_type, (rank, course) in picks.items():
+            slots = courses[courses_type]
+            slots.free[course] -= 1
+            if home and slots.departments[course] == home:
+                slots.home_free[course] -= 1
+            histograms[courses_type][rank] += 1
+        assignments.append((enrollment_number, picks))
+
+    report.allotted = len(assignments)
+    for courses_type, histogram in histograms.items():
+        report.rank_histogram[courses_type] = dict(sorted(histogram.items()))
+        report.first_choice[courses_type] = histogram.get(1, 0)
+        ranks = sum(rank * count for rank, count in histogram.items())
+        report.mean_rank[courses_type] = round(ranks / report.allotted, 3) if report.allotted else 0.0
+        report.seats_left[courses_type] = sum(courses[courses_type].free)
+    return assignments
+
+
+def _write(connection, semester: int, assignments, courses: Dict[str, CourseSlots]) -> None:
+    rows = []
+    taken = {courses_type: Counter() for courses_type in COURSE_TYPES}
+    for enrollment_number, picks in assignments:
+        vac_rank, vac = picks["VAC"]
+        voc_rank, voc = picks["VOC"]
+        rows.append({
+            "user_enrollment_number": enrollment_number,
+            "semester": semester,
+            "vac": courses["VAC"].names[vac],
+            "vac_papercode": courses["VAC"].codes[vac],
+            "voc": courses["VOC"].names[voc],
+            "voc_papercode": courses["VOC"].codes[voc],
+        })
+        taken["VAC"][courses["VAC"].codes[vac]] += 1
+        taken["VOC"][courses["VOC"].codes[voc]] += 1
+    if not rows:
+        return
+
+    # Students can still register first-come while the run computes; the unique
+    # (student, semester) index would reject their rows, so say so plainly.
+    enrollment_numbers = [row["user_enrollment_number"] for row in rows]
+    raced = []
+    for start in range(0, len(enrollment_numbers), WRITE_CHUNK_SIZE):
+        raced.extend(connection.execute(
+            select(registered_courses.c.user_enrollment_number).where(
+                registered_courses.c.semester == semester,
+                registered_courses.c.user_enrollment_number.in_(enrollment_numbers[start:start + WRITE_CHUNK_SIZE]),
+            )
+        ).scalars())
+    if raced:
+        raise AllotmentError(
+            f"{len(raced)} students (e.g. {raced[0]}) registered for semester {semester} while the allotment ran; "
+            f"nothing was written. Run it again to allot around them."
+        )
+    try:
+        connection.execute(insert(registered_courses), rows)
+    except IntegrityError:
+        raise AllotmentError(
+            f"A student registered for semester {semester} while the allotment was writing; "
+            f"nothing was written. Run it again to allot around them."
+        )
+    for courses_type, counts in taken.items():
+        table = COURSE_TABLES[courses_type]
+        codes = list(counts)
+        # One UPDATE per table; the CASE adds each course's allotted count.
+        connection.execute(
+            update(table)
+            .where(table.c.semester == semester, table.c.course_code.in_(codes))
+            .values(registered_seats=table.c.registered_seats + case(dict(counts), value=table.c.course_code, else_=0))
+        )
+        oversold = connection.execute(
+            select(func.count()).select_from(table).where(
+                table.c.semester == semester,
+                table.c.course_code.in_(codes),
+                table.c.registered_seats > table.c.total_seats,
+            )
+        ).scalar_one()
+        if oversold:
+            raise AllotmentError(f"{oversold} {courses_type} courses would be oversold; seats changed during the run.")
+
+    for start in range(0, len(enrollment_numbers), WRITE_CHUNK_SIZE):
+        connection.execute(
+            update(registrations)
+            .where(registrations.c.user_enrollment_number.in_(enrollment_numbers[start:start + WRITE_CHUNK_SIZE]))
+            .values(registration_status="Completed", revision=registrations.c.revision + 1)
+        )
+
+
+def run_allotment(semester: int, dry_run: bool = False, order: str = "random", seed: Optional[int] = None,
+                  home_department_quota: float = settings.ALLOTMENT_HOME_DEPARTMENT_QUOTA) -> AllotmentReport:
+    """Allots VAC/VOC seats for `semester` from the submitted preferences in one pass.
+
+    Students are served in a seeded random order (or by submission time),
+    so submitting early gives no advantage. Students who already have
+    courses for the semester are skipped and existing seats are left alone.
+    `home_department_quota` caps the share of a course's free seats that can
+    go to students whose major matches the course's department_name. All
+    writes happen in a single transaction, which rolls back with an
+    AllotmentError if any course would be oversold or an allotted student
+    registered through the first-come path in the meantime.
+    """
+    if order not in ALLOTMENT_ORDERS:
+        raise AllotmentError(f"Unknown order '{order}'. Must be one of: {', '.join(ALLOTMENT_ORDERS)}.")
+    if seed is None and order == "random":
+        seed = random.SystemRandom().randrange(2 ** 31)
+    report = AllotmentReport(semester=semester, dry_run=dry_run, order=order, seed=seed,
+                             home_department_quota=home_department_quota)
+
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        courses, choices, submitted, registered, majors = _load(connection, semester, home_department_quota)
+    report.load_seconds = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    students = sorted(enrollment_number for enrollment_number in choices if enrollment_number not in registered)
+    report.students = len(choices)
+    report.already_registered = len(choices) - len(students)
+    if order == "random":
+        random.Random(seed).shuffle(students)
+    else:
+        students.sort(key=lambda enrollment_number: submitted[enrollment_number])
+    assignments = _allot(students, choices, courses, majors, report)
+    report.compute_seconds = round(time.perf_counter() - started, 3)
+
+    if not dry_run:
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            _write(connection, semester, assignments, courses)
+        report.write_seconds = round(time.perf_counter() - started, 3)
+
+    logger.info(
+        f"Allotment for semester {semester}{' (dry run)' if dry_run else ''}: {report.allotted} of "
+        f"{len(students)} students allotted in {report.load_seconds + report.compute_seconds + report.write_seconds:.2f}s."
+    )
+    return report
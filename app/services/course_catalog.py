@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.repositories import courses_repository
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass
+class CatalogSnapshot:
+    expires_at: float
+    course_codes: List[str] = field(default_factory=list)
+    # course_code -> (JSON up to "available_seats":, JSON after the seat count)
+    fragments: Dict[str, Tuple[bytes, bytes]] = field(default_factory=dict)
+    total_seats: Dict[str, int] = field(default_factory=dict)
+    registered_seats: Dict[str, int] = field(default_factory=dict)
+
+    def render(self) -> bytes:
+        items = []
+        for course_code in self.course_codes:
+            available_seats = self.total_seats[course_code] - self.registered_seats[course_code]
+            if available_seats > 0:
+                prefix, suffix = self.fragments[course_code]
+                items.append(prefix + str(available_seats).encode() + suffix)
+        return b"[" + b",".join(items) + b"]"
+
+
+class CourseCatalog:
+    """Per-(semester, course type) snapshot of the course list.
+
+    The static part of every course is serialized once when the snapshot is
+    built; serving a request only overlays the current seat counts. Seats
+    taken through this worker update the overlay immediately, everything
+    else (other workers, admin edits) is picked up when the TTL runs out.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[Tuple[int, str], CatalogSnapshot] = {}
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+
+    async def _build(self, semester: int, courses_type: str) -> CatalogSnapshot:
+        snapshot = CatalogSnapshot(expires_at=time.monotonic() + self.ttl_seconds)
+        for course in await courses_repository.list_courses(courses_type, semester):
+            course_code = course["course_code"]
+            prefix = _dumps({
+                "name": course["course_name"],
+                "papercode": course_code,
+                "department_name": course["department_name"],
+            })[:-1] + ',"available_seats":'
+            suffix = f',"total_seats":{_dumps(course["total_seats"])}}}'
+            snapshot.course_codes.append(course_code)
+            snapshot.fragments[course_code] = (prefix.encode(), suffix.encode())
+            snapshot.total_seats[course_code] = course["total_seats"] or 0
+            snapshot.registered_seats[course_code] = course["registered_seats"] or 0
+        return snapshot
+
+    async def _snapshot(self, semester: int, courses_type: str) -> CatalogSnapshot:
+        key = (semester, courses_type)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and snapshot.expires_at > time.monotonic():
+            return snapshot
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None or snapshot.expires_at <= time.monotonic():
+                snapshot = await self._build(semester, courses_type)
+                self._snapshots[key] = snapshot
+            return snapshot
+
+    async def render(self, semester: int, courses_type: str) -> bytes:
+        return (await self._snapshot(semester, courses_type)).render()
+
+    async def available_seats(self, semester: int, courses_type: str) -> Dict[str, int]:
+        snapshot = await self._snapshot(semester, courses_type)
+        return {
+            course_code: snapshot.total_seats[course_code] - snapshot.registered_seats[course_code]
+            for course_code in snapshot.course_codes
+        }
+
+    def update_seats(self, semester: int, courses_type: str, course_code: str, registered_seats: int) -> None:
+        snapshot = self._snapshots.get((semester, courses_type))
+        if snapshot is None:
+            return
+        if course_code in snapshot.registered_seats:
+            snapshot.registered_seats[course_code] = registered_seats
+        else:
+            self.invalidate(semester, courses_type)
+
+    def invalidate(self, semester: Optional[int] = None, courses_type: Optional[str] = None) -> None:
+        for key in list(self._snapshots):
+            if (semester is None or key[0] == semester) and (courses_type is None or key[1] == courses_type):
+                self._snapshots.pop(key, None)
+
+
+course_catalog = CourseCatalog(ttl_seconds=settings.COURSE_CATALOG_TTL_SECONDS)
@@ -0,0 +1,330 @@
+import codecs
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Table, and_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import engine
+from app.config.logger import logger
+from app.config.settings import settings
+from app.repositories.courses_repository import COURSE_TABLES
+from app.schemas.course_schema import CourseImportRow
+from app.services.course_catalog import course_catalog
+
+IMPORT_COLUMNS = ("semester", "course_code", "course_name", "department_name", "total_seats")
+# registered_seats is deliberately absent: re-importing a catalog never resets seats already taken.
+# So is semester: course_code is the key, and moving a course would orphan its registrations.
+UPDATE_COLUMNS = ("course_name", "department_name", "total_seats")
+REQUIRED_HEADERS = ({"course_code", "papercode"}, {"course_name", "name"}, {"department_name"}, {"total_seats"})
+# A JSON value that still doesn't parse after this much buffered text is malformed, not incomplete.
+MAX_PENDING_JSON_CHARS = 1 << 20
+
+
+class CourseImportError(Exception):
+    """The upload as a whole can't be read (missing CSV columns, malformed JSON)."""
+
+
+@dataclass
+class CourseImportReport:
+    courses_type: str
+    semester: int
+    max_errors: int
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    superseded: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    errors: List[dict] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def add_error(self, row: int, message: str, course_code: Optional[str] = None) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "course_code": course_code, "error": message})
+        else:
+            self.errors_truncated = True
+
+    def as_dict(self) -> dict:
+        return {
+            "courses_type": self.courses_type,
+            "semester": self.semester,
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "completed": self.error is None,
+            "error": self.error,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+async def _decoded_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, dict]]:
+    header = None
+    record = ""
+    row_number = 0
+    async for line in _decoded_lines(chunks):
+        record += line
+        if record.count('"') % 2:
+            # Inside a quoted field that continues on the next line.
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            missing = [" or ".join(sorted(names)) for names in REQUIRED_HEADERS if not names & set(header)]
+            if missing:
+                raise CourseImportError(f"CSV header is missing: {', '.join(missing)}.")
+            continue
+        row_number += 1
+        # Empty cells count as absent so optional columns can be left blank.
+        yield row_number, {name: value for name, value in zip(header, values) if value.strip()}
+    if record.strip():
+        raise CourseImportError(f"Unterminated quoted field after row {row_number}.")
+
+
+async def iter_json_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """Rows of a JSON array or of newline-delimited JSON, decoded one value at a time."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer, position, row_number = "", 0, 0
+    in_array = closed = False
+    started = False
+
+    async def values(final: bool):
+        nonlocal buffer, position, row_number, in_array, closed, started
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or (in_array and buffer[position] == ",")):
+                position += 1
+            if position >= len(buffer):
+                return
+            if closed:
+                raise CourseImportError(f"Unexpected data after the closing ']' following row {row_number}.")
+            if not started:
+                started = True
+                if buffer[position] == "[":
+                    in_array = True
+                    position += 1
+                    continue
+            if in_array and buffer[position] == "]":
+                closed = True
+                position += 1
+                continue
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if final or len(buffer) - position > MAX_PENDING_JSON_CHARS:
+                    raise CourseImportError(f"Malformed JSON after row {row_number}: {e.msg}.")
+                return
+            row_number += 1
+            yield row_number, value
+
+    async for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        async for row in values(final=False):
+            yield row
+    buffer = buffer[position:] + text_decoder.decode(b"", final=True)
+    position = 0
+    async for row in values(final=True):
+        yield row
+    if in_array and not closed:
+        raise CourseImportError("JSON array is missing its closing ']'.")
+
+
+def _validate(raw, semester: int) -> Tuple[Optional[dict], Optional[str]]:
+    if not isinstance(raw, dict):
+        return None, "Row must be an object."
+    try:
+        row = CourseImportRow.model_validate(raw)
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+        )
+    if row.semester is not None and row.semester != semester:
+        return None, f"Row is for semester {row.semester}, but this import is for semester {semester}."
+    return {
+        "semester": semester,
+        "course_code": row.course_code,
+        "course_name": row.course_name,
+        "department_name": row.department_name,
+        "total_seats": row.total_seats,
+    }, None
+
+
+def _upsert_statement(table: Table, dialect_name: str):
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=["course_code"],
+        set_={column: statement.excluded[column] for column in UPDATE_COLUMNS},
+        # Backstop for rows _reject_conflicts() let through before a concurrent change.
+        where=and_(
+            table.c.semester == statement.excluded.semester,
+            statement.excluded.total_seats >= table.c.registered_seats,
+        ),
+    )
+
+
+def _reject_conflicts(connection, table: Table, rows: List[dict]) -> Tuple[List[dict], Dict[str, str]]:
+    """Splits off rows that would move an existing course to another semester or
+    cut its seats below those already registered; returns (rows to write, {course_code: error})."""
+    existing = {
+        course_code: (semester, registered_seats or 0)
+        for course_code, semester, registered_seats in connection.execute(
+            select(table.c.course_code, table.c.semester, table.c.registered_seats)
+            .where(table.c.course_code.in_([row["course_code"] for row in rows]))
+        )
+    }
+    accepted, rejected = [], {}
+    for row in rows:
+        semester, registered_seats = existing.get(row["course_code"], (row["semester"], 0))
+        if semester != row["semester"]:
+            rejected[row["course_code"]] = f"Course {row['course_code']} already exists in semester {semester}."
+        elif row["total_seats"] < registered_seats:
+            rejected[row["course_code"]] = (
+                f"total_seats {row['total_seats']} is below the {registered_seats} seats already registered."
+            )
+        else:
+            accepted.append(row)
+    return accepted, rejected
+
+
+def _copy_upsert(connection, table: Table, rows: List[dict]) -> None:
+    # COPY into a session-local staging table, then one set-based upsert.
+    columns = ", ".join(IMPORT_COLUMNS)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS course_import (semester integer, course_code varchar, "
+            "course_name varchar, department_name varchar, total_seats integer) ON COMMIT DELETE ROWS"
+        )
+        data = io.StringIO()
+        csv.writer(data).writerows(tuple(row[column] for column in IMPORT_COLUMNS) for row in rows)
+        data.seek(0)
+        cursor.copy_expert(f"COPY course_import ({columns}) FROM STDIN WITH (FORMAT csv)", data)
+    finally:
+        cursor.close()
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS)
+    connection.execute(text(
+        f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM course_import "
+        f"ON CONFLICT (course_code) DO UPDATE SET {updates} "
+        f"WHERE {table.name}.semester = EXCLUDED.semester AND EXCLUDED.total_seats >= {table.name}.registered_seats"
+    ))
+
+
+def _write_batch(table: Table, rows: List[dict]) -> Dict[str, str]:
+    with engine.begin() as connection:
+        rows, rejected = _reject_conflicts(connection, table, rows)
+        if not rows:
+            return rejected
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+            _copy_upsert(connection, table, rows)
+        else:
+            # executemany; SQLAlchemy batches these into multi-row INSERTs.
+            connection.execute(_upsert_statement(table, connection.dialect.name), rows)
+    return rejected
+
+
+def _write_rows_individually(table: Table, entries: List[Tuple[int, dict]]) -> List[Tuple[int, dict, str]]:
+    failures = []
+    for row_number, values in entries:
+        try:
+            rejected = _write_batch(table, [values])
+        except SQLAlchemyError as e:
+            failures.append((row_number, values, str(getattr(e, "orig", None) or e).splitlines()[0]))
+            continue
+        if rejected:
+            failures.append((row_number, values, rejected[values["course_code"]]))
+    return failures
+
+
+async def _flush(table: Table, batch: Dict[str, Tuple[int, dict]], report: CourseImportReport) -> None:
+    entries = list(batch.values())
+    batch.clear()
+    report.batches += 1
+    try:
+        rejected = await run_in_threadpool(_write_batch, table, [values for _, values in entries])
+        report.imported += len(entries) - len(rejected)
+        for row_number, values in entries:
+            if values["course_code"] in rejected:
+                report.add_error(row_number, rejected[values["course_code"]], values["course_code"])
+    except SQLAlchemyError as e:
+        # Find the offending rows instead of failing everything in the batch.
+        logger.warning(f"Course import batch of {len(entries)} rows failed ({e.__class__.__name__}), retrying row by row.")
+        failures = await run_in_threadpool(_write_rows_individually, table, entries)
+        report.imported += len(entries) - len(failures)
+        for row_number, values, message in failures:
+            report.add_error(row_number, message, values["course_code"])
+
+
+async def import_courses(courses_type: str, semester: int, chunks: AsyncIterable[bytes], upload_format: str,
+                         batch_size: int = settings.COURSE_IMPORT_BATCH_SIZE,
+                         max_errors: int = settings.COURSE_IMPORT_MAX_ERRORS) -> CourseImportReport:
+    """Upserts a streamed CSV or JSON catalog into the VAC or VOC table in batches.
+
+    Only one batch is held in memory. Invalid rows are reported and skipped,
+    and a row repeating a course code replaces the earlier one in its batch.
+    Existing courses keep their semester and registered seats: rows for a
+    code that belongs to another semester, or with fewer total_seats than
+    are already registered, are reported as errors.
+    If the upload itself turns out to be unreadable part way through, the
+    batches before that point stay imported and `report.error` says why.
+    """
+    table = COURSE_TABLES[courses_type]
+    report = CourseImportReport(courses_type=courses_type, semester=semester, max_errors=max_errors)
+    started = time.perf_counter()
+    batch: Dict[str, Tuple[int, dict]] = {}
+    rows = iter_csv_rows(chunks) if upload_format == "csv" else iter_json_rows(chunks)
+    try:
+        async for row_number, raw in rows:
+            report.rows += 1
+            values, error = _validate(raw, semester)
+            if error is not None:
+                course_code = raw.get("course_code", raw.get("papercode")) if isinstance(raw, dict) else None
+                report.add_error(row_number, error, course_code)
+                continue
+            if values["course_code"] in batch:
+                report.superseded += 1
+            batch[values["course_code"]] = (row_number, values)
+            if len(batch) >= batch_size:
+                await _flush(table, batch, report)
+    except CourseImportError as e:
+        report.error = str(e)
+    if batch:
+        await _flush(table, batch, report)
+
+    course_catalog.invalidate(semester=semester, courses_type=courses_type)
+    report.seconds = time.perf_counter() - started
+    logger.info(
+        f"Imported {report.imported} {courses_type} courses for semester {semester} "
+        f"({report.failed} failed) in {report.seconds:.2f}s."
+    )
+    return report
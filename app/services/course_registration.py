@@ -0,0 +1,210 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config.database import INTEGRITY_ERRORS, db
+from app.config.settings import settings
+from app.repositories import courses_repository, idempotency_repository, registrations_repository
+from app.schemas.user_schema import UserCoursesRequest
+from app.services import seat_reservation
+from app.services.seat_reservation import CourseFullError, CourseNotFoundError, SeatCount, SeatReservationError
+from app.services.waitlist import Promotion, waitlist
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
+COMPLETED_RESPONSE = {"success": True, "message": "Courses registration completed."}
+
+
+class AlreadyRegisteredError(Exception):
+    def __init__(self, semester: int) -> None:
+        self.message = f"Courses are already registered for semester {semester}."
+        super().__init__(self.message)
+
+
+class IdempotencyKeyReusedError(Exception):
+    def __init__(self) -> None:
+        self.message = f"This {IDEMPOTENCY_HEADER} was already used for a different request."
+        super().__init__(self.message)
+
+
+@dataclass
+class CourseChange:
+    seat_counts: List[Tuple[str, SeatCount]] = field(default_factory=list)
+    promotions: List[Promotion] = field(default_factory=list)
+
+    def released(self, courses_type: str, promotion: Optional[Promotion], seat_count: Optional[SeatCount]) -> None:
+        if promotion is not None:
+            self.promotions.append(promotion)
+        if seat_count is not None:
+            self.seat_counts.append((courses_type, seat_count))
+
+
+@dataclass
+class RegistrationResult:
+    status_code: int
+    body: dict
+    replayed: bool = False
+    seat_counts: Dict[str, SeatCount] = field(default_factory=dict)
+    # Seats of other courses given up by leaving their waitlists.
+    waitlist_change: CourseChange = field(default_factory=CourseChange)
+
+
+def _request_hash(user_courses: UserCoursesRequest) -> str:
+    payload = json.dumps(user_courses.model_dump(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _same_courses(record, user_courses: UserCoursesRequest) -> bool:
+    return (record["vac_papercode"], record["voc_papercode"]) == (user_courses.vac_papercode, user_courses.voc_papercode)
+
+
+async def register_courses(enrollment_number: str, user_courses: UserCoursesRequest,
+                           client_key: Optional[str] = None) -> RegistrationResult:
+    """Reserves the seats and records the course choice exactly once.
+
+    The idempotency key (enrollment number and semester, plus the client's
+    header when there is one) is claimed first in the same transaction,
+    so a replay returns the stored response before any seat counter is
+    touched. The unique (enrollment, semester) index on registered_courses
+    backs this up once a key has expired.
+    """
+    key = idempotency_repository.key_for(enrollment_number, user_courses.semester, client_key)
+    request_hash = _request_hash(user_courses)
+    now = datetime.utcnow()
+
+    try:
+        async with db.transaction():
+            claimed = await idempotency_repository.claim_key(
+                key, request_hash, 200, json.dumps(COMPLETED_RESPONSE),
+                now=now, expires=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+            )
+            if not claimed:
+                stored = await idempotency_repository.get_key(key)
+                if stored is not None:
+                    if stored["request_hash"] != request_hash:
+                        if client_key:
+                            raise IdempotencyKeyReusedError()
+                        raise AlreadyRegisteredError(user_courses.semester)
+                    return RegistrationResult(stored["status_code"], json.loads(stored["response_body"]), replayed=True)
+
+            course_codes = {
+                'VAC': user_courses.vac_papercode,
+                'VOC': user_courses.voc_papercode,
+            }
+            # A seat held for this student by the waitlist is already counted.
+            held = await waitlist.claim_holds(enrollment_number, user_courses.semester, course_codes)
+            waitlist_change = CourseChange()
+            await _leave_waitlists(enrollment_number, user_courses.semester, course_codes, waitlist_change)
+            seat_counts = await seat_reservation.reserve_seats(user_courses.semester, {
+                courses_type: course_code for courses_type, course_code in course_codes.items() if courses_type not in held
+            })
+            await registrations_repository.set_registration_status(enrollment_number, "Completed")
+            await registrations_repository.create_registered_course(
+                enrollment_number=enrollment_number,
+                semester=user_courses.semester,
+                vac=user_courses.vac,
+                vac_papercode=user_courses.vac_papercode,
+                voc=user_courses.voc,
+                voc_papercode=user_courses.voc_papercode
+            )
+    except (SeatReservationError, AlreadyRegisteredError, IdempotencyKeyReusedError):
+        raise
+    except INTEGRITY_ERRORS:
+        # The unique (enrollment, semester) index; the transaction, seat
+        # increments included, has been rolled back.
+        existing = await registrations_repository.get_registered_course(enrollment_number, user_courses.semester)
+        if existing is None:
+            raise
+        if not _same_courses(existing, user_courses):
+            raise AlreadyRegisteredError(user_courses.semester)
+        return RegistrationResult(200, COMPLETED_RESPONSE, replayed=True)
+
+    return RegistrationResult(200, COMPLETED_RESPONSE, seat_counts=seat_counts, waitlist_change=waitlist_change)
+
+
+class NotRegisteredError(Exception):
+    def __init__(self, semester: int) -> None:
+        self.message = f"No courses are registered for semester {semester}."
+        super().__init__(self.message)
+
+
+async def _leave_waitlists(enrollment_number: str, semester: int, course_codes: dict, change: CourseChange) -> None:
+    """Takes the student off the waitlists for the types in `course_codes` once they have a seat of that type.
+
+    Runs inside the caller's transaction; a seat still held for the student
+    goes to the next one in that queue.
+    """
+    for courses_type, promotion, seat_count in await waitlist.leave_all(enrollment_number, semester, course_codes):
+        change.released(courses_type, promotion, seat_count)
+
+
+def _seat_count(row) -> SeatCount:
+    return SeatCount(row["course_code"], row["registered_seats"], row["total_seats"])
+
+
+async def swap_course(enrollment_number: str, semester: int, courses_type: str, course_code: str) -> CourseChange:
+    """Moves the student's VAC or VOC seat to `course_code` in one transaction.
+
+    Without a waitlist on the old course or a held seat on the new one, both
+    counters move in a single conditional UPDATE, which fails as a whole if
+    the new course is full. Otherwise the old seat goes to the head of its
+    waitlist and only the new seat is reserved (or the held one claimed).
+    """
+    registered = await registrations_repository.get_registered_course(enrollment_number, semester)
+    if registered is None:
+        raise NotRegisteredError(semester)
+    current_code = registered["vac_papercode" if courses_type == "VAC" else "voc_papercode"]
+    change = CourseChange()
+    if current_code == course_code:
+        return change
+
+    async with db.transaction():
+        promotion = await waitlist.offer_seat(courses_type, current_code, semester)
+        held = await waitlist.claim_holds(enrollment_number, semester, {courses_type: course_code})
+        await _leave_waitlists(enrollment_number, semester, {courses_type: course_code}, change)
+
+        if promotion is None and not held:
+            rows = {row["course_code"]: row for row in await courses_repository.move_seat(
+                courses_type, current_code, course_code, semester
+            )}
+            if course_code not in rows:
+                if await courses_repository.course_exists(courses_type, course_code, semester):
+                    raise CourseFullError(courses_type, course_code)
+                raise CourseNotFoundError(courses_type, course_code)
+            change.seat_counts.extend((courses_type, _seat_count(row)) for row in rows.values())
+        else:
+            if promotion is not None:
+                change.promotions.append(promotion)
+            else:
+                row = await courses_repository.release_seat(courses_type, current_code, semester)
+                if row is not None:
+                    change.seat_counts.append((courses_type, _seat_count(row)))
+            if not held:
+                seat_counts = await seat_reservation.reserve_seats(semester, {courses_type: course_code})
+                change.seat_counts.append((courses_type, seat_counts[courses_type]))
+
+        if not await registrations_repository.change_course_choice(
+            enrollment_number, semester, courses_type, current_code, course_code
+        ):
+            # Changed by a concurrent request since it was read; undo the seat moves.
+            raise NotRegisteredError(semester)
+    return change
+
+
+async def drop_courses(enrollment_number: str, semester: int) -> CourseChange:
+    """Deletes the student's course choice for `semester` and releases both seats."""
+    change = CourseChange()
+    async with db.transaction():
+        dropped = await registrations_repository.delete_registered_course(enrollment_number, semester)
+        if dropped is None:
+            raise NotRegisteredError(semester)
+        for courses_type, course_code in (("VAC", dropped["vac_papercode"]), ("VOC", dropped["voc_papercode"])):
+            if course_code:
+                change.released(courses_type, *await waitlist.release_seat(courses_type, course_code, semester))
+        if not await registrations_repository.list_registered_courses(enrollment_number):
+            await registrations_repository.set_registration_status(enrollment_number, "Partial")
+        # Otherwise a later registration for this semester would be answered as a replay.
+        await idempotency_repository.delete_keys_for(enrollment_number, semester)
+    return change
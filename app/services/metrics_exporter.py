@@ -0,0 +1,210 @@
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from anyio import to_thread
+
+from app.config.database import db, engine
+from app.config.metrics import Counter, Gauge, Metric, registry
+from app.config.sql_instrumentation import sql_stats_registry
+from app.services.admission import admission_controller
+from app.services.passwords import password_service
+from app.services.registration_data import registration_data
+from app.services.seat_broadcaster import seat_broadcaster
+from app.services.seat_reconciler import seat_reconciler
+from app.services.session_cache import session_cache
+from app.services.session_reaper import session_reaper
+from app.services.sms import sms_dispatcher
+from app.services.waitlist import waitlist
+
+COUNTER = "counter"
+GAUGE = "gauge"
+
+
+class StatMetric(NamedTuple):
+    name: str
+    kind: str
+    documentation: str
+    # Label for stats that are {label: number} dicts
+    label: str = "key"
+
+
+def _ttl_cache_metrics(prefix: str, what: str) -> Dict[str, StatMetric]:
+    return {
+        "entries": StatMetric(f"{prefix}_entries", GAUGE, f"{what} currently cached."),
+        "max_entries": StatMetric(f"{prefix}_max_entries", GAUGE, f"Most {what.lower()} the cache holds."),
+        "hits": StatMetric(f"{prefix}_hits_total", COUNTER, f"{what} served from the cache."),
+        "misses": StatMetric(f"{prefix}_misses_total", COUNTER, f"{what} not found in the cache or expired."),
+        "evictions": StatMetric(f"{prefix}_evictions_total", COUNTER, f"{what} evicted to stay within max entries."),
+        "expirations": StatMetric(f"{prefix}_expirations_total", COUNTER, f"{what} dropped after their TTL."),
+    }
+
+
+# Service stats() keys -> how they are exported. Keys without an entry are not exported;
+# a dict of StatMetrics describes a stat whose values are {label: {key: number}}.
+SERVICE_STATS: Dict[str, Tuple[Callable[[], dict], dict]] = {
+    "session_cache": (session_cache.stats, _ttl_cache_metrics("session_cache", "Sessions")),
+    "expiry_reaper": (session_reaper.stats, {
+        "runs": StatMetric("expiry_reaper_runs_total", COUNTER, "Completed expiry reaper runs."),
+        "removed_by_table": StatMetric("expiry_reaper_removed_total", COUNTER,
+                                       "Expired rows deleted by the reaper, per table.", label="table"),
+        "last_run_by_table": StatMetric("expiry_reaper_last_run_removed", GAUGE,
+                                        "Expired rows deleted by the last run, per table.", label="table"),
+        "last_run_seconds": StatMetric("expiry_reaper_last_run_seconds", GAUGE, "Duration of the last reaper run."),
+        "sessions_remaining": StatMetric("expiry_reaper_sessions_remaining", GAUGE,
+                                         "Rows in the sessions table after the last run."),
+    }),
+    "seat_stream": (seat_broadcaster.stats, {
+        "connections": StatMetric("seat_stream_connections", GAUGE, "Open seat-stream connections."),
+        "streams": StatMetric("seat_stream_subscribers", GAUGE, "Seat-stream subscribers per semester:type stream.",
+                              label="stream"),
+        "events_sent": StatMetric("seat_stream_events_sent_total", COUNTER, "Seat count events sent to subscribers."),
+        "subscribers_dropped": StatMetric("seat_stream_subscribers_dropped_total", COUNTER,
+                                          "Subscribers disconnected for falling too far behind."),
+    }),
+    "admission": (admission_controller.stats, {
+        "active": StatMetric("admission_active", GAUGE, "Registrants holding an admission lease."),
+        "queued": StatMetric("admission_queued", GAUGE, "Registrants waiting in the queue."),
+        "max_active": StatMetric("admission_max_active", GAUGE, "Most admission leases handed out at once."),
+        "admitted_total": StatMetric("admission_admitted_total", COUNTER, "Registrants admitted from the queue."),
+        "expired_leases": StatMetric("admission_expired_leases_total", COUNTER, "Leases that expired from inactivity."),
+        "abandoned": StatMetric("admission_abandoned_total", COUNTER, "Queued registrants that stopped polling."),
+        "rejected": StatMetric("admission_rejected_total", COUNTER, "Registrants turned away because the queue was full."),
+    }),
+    "sms_dispatcher": (sms_dispatcher.stats, {
+        "queued": StatMetric("sms_queued", GAUGE, "SMS messages waiting to be sent."),
+        "queue_size": StatMetric("sms_queue_size", GAUGE, "Capacity of the outbound SMS queue."),
+        "providers": {
+            "sent": StatMetric("sms_sent_total", COUNTER, "SMS messages accepted by the provider.", label="provider"),
+            "failed": StatMetric("sms_failed_total", COUNTER, "SMS messages given up on after retries.",
+                                 label="provider"),
+            "retries": StatMetric("sms_retries_total", COUNTER, "SMS send attempts that were retried.",
+                                  label="provider"),
+            "latency_avg_seconds": StatMetric("sms_latency_avg_seconds", GAUGE,
+                                              "Mean provider call latency.", label="provider"),
+            "latency_p95_seconds": StatMetric("sms_latency_p95_seconds", GAUGE,
+                                              "95th percentile of recent provider call latencies.", label="provider"),
+            "latency_max_seconds": StatMetric("sms_latency_max_seconds", GAUGE,
+                                              "Slowest provider call.", label="provider"),
+        },
+    }),
+    "password_service": (password_service.stats, {
+        "workers": StatMetric("password_pool_workers", GAUGE, "Processes in the bcrypt pool."),
+        "pending": StatMetric("password_pending", GAUGE, "Password hashes and checks queued or running."),
+        "max_pending": StatMetric("password_max_pending", GAUGE, "Most password operations allowed in flight."),
+        "rejected": StatMetric("password_rejected_total", COUNTER, "Password operations shed because the pool was busy."),
+        "pool_restarts": StatMetric("password_pool_restarts_total", COUNTER,
+                                    "bcrypt pools replaced after a worker process died."),
+        "rounds": StatMetric("password_bcrypt_rounds", GAUGE, "Configured bcrypt cost."),
+    }),
+    "registration_data_cache": (registration_data.stats, {
+        **_ttl_cache_metrics("registration_data_cache", "Rendered registrations"),
+        "stale": StatMetric("registration_data_cache_stale_total", COUNTER,
+                            "Cached registrations re-rendered because their revision changed."),
+    }),
+    "waitlist": (waitlist.stats, {
+        "joined": StatMetric("waitlist_joined_total", COUNTER, "Students who joined a course waitlist."),
+        "promoted": StatMetric("waitlist_promoted_total", COUNTER, "Seats offered to the head of a waitlist."),
+        "claimed": StatMetric("waitlist_claimed_total", COUNTER, "Held seats claimed by registering."),
+        "expired": StatMetric("waitlist_expired_total", COUNTER, "Held seats released unclaimed."),
+        "notifications_dropped": StatMetric("waitlist_notifications_dropped_total", COUNTER,
+                                            "Seat offer SMS dropped because the SMS queue was full."),
+    }),
+    "seat_reconciler": (seat_reconciler.stats, {
+        "runs": StatMetric("seat_reconciler_runs_total", COUNTER, "Completed seat-counter reconciliation runs."),
+        "total_corrected": StatMetric("seat_reconciler_corrected_total", COUNTER, "Seat counters corrected."),
+        "last_run_drifted": StatMetric("seat_reconciler_last_run_drifted", GAUGE,
+                                       "Seat counters found drifted by the last run."),
+        "last_run_corrected": StatMetric("seat_reconciler_last_run_corrected", GAUGE,
+                                         "Seat counters corrected by the last run."),
+        "last_run_seconds": StatMetric("seat_reconciler_last_run_seconds", GAUGE, "Duration of the last run."),
+    }),
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _threadpool_stats() -> Dict[tuple, float]:
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        ("capacity",): limiter.total_tokens,
+        ("busy",): limiter.borrowed_tokens,
+        ("waiting",): limiter.statistics().tasks_waiting,
+    }
+
+
+def _pool_size() -> Dict[tuple, float]:
+    values = {}
+    if hasattr(engine.pool, "size"):
+        values[("sync",)] = engine.pool.size()
+    async_pool = getattr(db._backend, "_pool", None)
+    if async_pool is not None and hasattr(async_pool, "get_size"):
+        values[("async",)] = async_pool.get_size()
+    return values
+
+
+def _pool_overflow() -> Dict[tuple, float]:
+    # QueuePool reports negative overflow until its base size has been filled
+    return {("sync",): max(0, engine.pool.overflow())} if hasattr(engine.pool, "overflow") else {}
+
+
+registry.gauge("threadpool_tokens", "Default anyio worker thread limiter: capacity, busy and waiting tasks.",
+               ("state",), collect=_threadpool_stats)
+registry.gauge("db_pool_size", "Connections currently held open by a pool.", ("pool",), collect=_pool_size)
+registry.gauge("db_pool_overflow", "Connections opened beyond the sync pool's base size.", ("pool",),
+               collect=_pool_overflow)
+
+
+def _collected(spec: StatMetric, samples: Dict[tuple, float], labelled: bool) -> Metric:
+    metric_class = Counter if spec.kind == COUNTER else Gauge
+    return metric_class(spec.name, spec.documentation, (spec.label,) if labelled else (),
+                        collect=lambda: samples)
+
+
+def _service_metrics(stats: dict, specs: dict) -> List[Metric]:
+    """Turns a service's stats() dict into metrics as described by `specs`. Numbers
+    become one metric, {label: number} dicts one labelled metric and
+    {label: {key: number}} dicts one labelled metric per key."""
+    metrics = []
+    for key, spec in specs.items():
+        value = stats.get(key)
+        if isinstance(spec, StatMetric):
+            if _is_number(value):
+                metrics.append(_collected(spec, {(): value}, labelled=False))
+            elif isinstance(value, dict):
+                samples = {(str(label),): item for label, item in value.items() if _is_number(item)}
+                metrics.append(_collected(spec, samples, labelled=True))
+        elif isinstance(value, dict):
+            for nested_key, nested_spec in spec.items():
+                samples = {
+                    (str(label),): nested[nested_key]
+                    for label, nested in value.items()
+                    if _is_number((nested or {}).get(nested_key))
+                }
+                metrics.append(_collected(nested_spec, samples, labelled=True))
+    return metrics
+
+
+def _sql_route_metrics() -> List[Metric]:
+    snapshot = sql_stats_registry.snapshot()
+    metrics = []
+    for key, documentation in (
+        ("statements", "SQL statements run, per route."),
+        ("db_seconds", "Seconds spent in SQL statements, per route."),
+        ("n_plus_one_requests", "Requests that repeated a statement often enough to look like an N+1, per route."),
+    ):
+        samples = {(route,): stats[key] for route, stats in snapshot.items()}
+        metrics.append(Counter(f"sql_route_{key}_total", documentation, ("route",), collect=lambda samples=samples: samples))
+    return metrics
+
+
+def render_metrics() -> str:
+    lines = [registry.render()]
+    extra = _sql_route_metrics()
+    for stats, specs in SERVICE_STATS.values():
+        extra.extend(_service_metrics(stats(), specs))
+    for metric in extra:
+        samples = metric.render()
+        if samples:
+            lines.append("\n".join(metric.header() + samples) + "\n")
+    return "".join(lines)
@@ -0,0 +1,111 @@
+import heapq
+import hmac
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Tuple
+
+from app.config.settings import settings
+from app.repositories import otp_repository
+
+
+class OTPCheck(str, Enum):
+    VALID = "valid"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    LOCKED = "locked"
+
+
+@dataclass
+class _PendingOTP:
+    code: str
+    expires_at: float
+    attempts: int = 0
+
+
+class InMemoryOTPStore:
+    """Per-process OTP store; only correct when running a single worker.
+
+    Entries sit in a dict for lookups and in a min-heap ordered by expiry so
+    that every call can drop whatever has expired without scanning.
+    """
+
+    def __init__(self, ttl_seconds: int, max_attempts: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self._pending: Dict[str, _PendingOTP] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def _purge_expired(self, now: float) -> None:
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, phone_number = heapq.heappop(self._expiry_heap)
+            pending = self._pending.get(phone_number)
+            # A newer code for the same number has its own heap entry.
+            if pending is not None and pending.expires_at == expires_at:
+                del self._pending[phone_number]
+
+    async def put(self, phone_number: str, code: str) -> None:
+        now = time.monotonic()
+        self._purge_expired(now)
+        expires_at = now + self.ttl_seconds
+        self._pending[phone_number] = _PendingOTP(code=code, expires_at=expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, phone_number))
+
+    async def verify(self, phone_number: str, code: str) -> OTPCheck:
+        self._purge_expired(time.monotonic())
+        pending = self._pending.get(phone_number)
+        if pending is None:
+            return OTPCheck.EXPIRED
+        if pending.attempts >= self.max_attempts:
+            return OTPCheck.LOCKED
+        pending.attempts += 1
+        if hmac.compare_digest(pending.code, code):
+            return OTPCheck.VALID
+        if pending.attempts >= self.max_attempts:
+            return OTPCheck.LOCKED
+        return OTPCheck.INVALID
+
+    async def discard(self, phone_number: str) -> None:
+        self._pending.pop(phone_number, None)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class DatabaseOTPStore:
+    """OTP store shared by every worker through the `otp_codes` table."""
+
+    def __init__(self, ttl_seconds: int, max_attempts: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+
+    async def put(self, phone_number: str, code: str) -> None:
+        expires = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        await otp_repository.save_otp(phone_number, code, expires)
+
+    async def verify(self, phone_number: str, code: str) -> OTPCheck:
+        row = await otp_repository.record_attempt(phone_number, datetime.utcnow(), self.max_attempts)
+        if row is None:
+            # Missing, expired or out of attempts; the latter two look the
+            # same to the user: they need a new code.
+            return OTPCheck.EXPIRED
+        if hmac.compare_digest(row["code"], code):
+            return OTPCheck.VALID
+        if row["attempts"] >= self.max_attempts:
+            return OTPCheck.LOCKED
+        return OTPCheck.INVALID
+
+    async def discard(self, phone_number: str) -> None:
+        await otp_repository.delete_otp(phone_number)
+
+
+def create_otp_store():
+    if settings.OTP_STORE == "memory":
+        return InMemoryOTPStore(settings.OTP_TTL_SECONDS, settings.OTP_MAX_ATTEMPTS)
+    if settings.OTP_STORE == "database":
+        return DatabaseOTPStore(settings.OTP_TTL_SECONDS, settings.OTP_MAX_ATTEMPTS)
+    raise RuntimeError(f"Unknown OTP_STORE '{settings.OTP_STORE}'. Must be 'memory' or 'database'.")
+
+
+otp_store = create_otp_store()
@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config.logger import logger
+from app.config.settings import settings
+
+
+class PasswordServiceBusy(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _crypt_context(rounds: int) -> CryptContext:
+    # Pinning min/max to the configured cost makes any hash with a different
+    # cost "need update", so changing BCRYPT_ROUNDS rehashes on next login.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+
+def _verify_password(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordService:
+    """Runs bcrypt in a dedicated process pool, off the event loop and the GIL.
+
+    At most `max_pending` operations may be queued or running; beyond that
+    callers get PasswordServiceBusy immediately so a login surge is shed
+    instead of building an unbounded backlog.
+
+    Every server process has its own pool, so by default the CPUs are split
+    between the `server_processes` running on the host rather than each
+    one starting a process per CPU.
+
+    A pool whose child died (OOM kill, segfault) is broken for good, so it
+    is replaced and the operation retried once on the new pool.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int, server_processes: int = 1) -> None:
+        self.rounds = rounds
+        self.workers = workers or max(1, (os.cpu_count() or 1) // max(1, server_processes))
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        # Concurrent callers all see the same broken pool; only the first replaces it.
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self.pool_restarts += 1
+        logger.error("Password worker pool broke (a worker process died); starting a new one.")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, func, *args):
+        self.start()
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordServiceBusy("Too many password operations in progress.")
+        self.pending += 1
+        try:
+            try:
+                return await self._submit(func, *args)
+            except BrokenProcessPool:
+                pass
+            try:
+                return await self._submit(func, *args)
+            except BrokenProcessPool:
+                raise PasswordServiceBusy("The password worker pool is restarting.")
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Returns (matches, new_hash); new_hash is set when the stored cost is outdated."""
+        return await self._run(_verify_password, password, hashed_password, self.rounds)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "pool_restarts": self.pool_restarts,
+            "rounds": self.rounds,
+        }
+
+
+password_service = PasswordService(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_POOL_WORKERS,
+    max_pending=settings.PASSWORD_MAX_PENDING,
+    server_processes=settings.WEB_CONCURRENCY,
+)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config.settings import settings
+from app.repositories import registrations_repository
+from app.services.ttl_cache import TTLCache
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass
+class RenderedRegistration:
+    revision: int
+    body: bytes
+    etag: str
+
+
+def _render(rows) -> bytes:
+    registration = rows[0]
+    courses = [row for row in rows if row["course_semester"] is not None]
+    data = {
+        "name": registration["name"],
+        "id": registration["id"],
+        "user_enrollment_number": registration["user_enrollment_number"],
+        "mobile_no": registration["mobile_no"],
+        "gender": registration["gender"],
+        "programme_name": registration["programme_name"],
+        "minor_allotted_subject": registration["minor_allotted_subject"],
+        "abc_id": registration["abc_id"],
+        "registration_status": registration["registration_status"],
+        "faculty_number": registration["faculty_number"],
+        "major_allotted_subject": registration["major_allotted_subject"],
+        "generic_allotted_subject": registration["generic_allotted_subject"],
+    }
+    for index, suffix in enumerate(("I", "II")):
+        course = courses[index] if index < len(courses) else None
+        data[f"semester_{suffix}"] = course["course_semester"] if course else 0
+        for column in ("vac", "vac_papercode", "voc", "voc_papercode"):
+            data[f"{column}_{suffix}"] = course[column] if course else ""
+    return _dumps(data).encode()
+
+
+class RegistrationDataCache:
+    """Rendered `complete-registration-data` bodies per enrollment number.
+
+    Each entry is tagged with the `revision` of the student's registrations
+    row, which every write to their registration or courses bumps (the API,
+    the allotment, another device). A hit costs one primary-key lookup of
+    that revision, so no worker serves a copy older than the database.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.stale = 0
+
+    async def get(self, enrollment_number: str) -> Optional[RenderedRegistration]:
+        rendered = self._cache.get(enrollment_number)
+        if rendered is not None:
+            if await registrations_repository.get_revision(enrollment_number) == rendered.revision:
+                return rendered
+            self.stale += 1
+            self._cache.invalidate(enrollment_number)
+        rows = await registrations_repository.get_registration_with_courses(enrollment_number)
+        if not rows:
+            return None
+        body = _render(rows)
+        rendered = RenderedRegistration(
+            revision=rows[0]["revision"],
+            body=body,
+            etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+        )
+        self._cache.set(enrollment_number, rendered)
+        return rendered
+
+    def stats(self) -> dict:
+        # Stale entries are also counted as cache hits.
+        return {**self._cache.stats(), "stale": self.stale}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison.
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+registration_data = RegistrationDataCache(
+    max_entries=settings.REGISTRATION_DATA_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REGISTRATION_DATA_CACHE_TTL_SECONDS,
+)
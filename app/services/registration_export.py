@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import engine
+from app.config.logger import logger
+from app.config.settings import settings
+from app.repositories.registrations_repository import registration_export_query
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _render_csv(rows, header=None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _render_ndjson(rows, columns) -> bytes:
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows).encode()
+
+
+async def stream_registrations(semester: Optional[int], export_format: str,
+                               batch_size: int = settings.REGISTRATION_EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Streams the registration export one `batch_size` partition at a time.
+
+    The query runs on the sync engine with `yield_per`, so PostgreSQL uses a
+    server-side cursor and memory stays flat however many students there are.
+    Each fetch runs in the threadpool and releases it between partitions.
+    """
+    connection = await run_in_threadpool(engine.connect)
+    exported = 0
+    try:
+        result = await run_in_threadpool(
+            connection.execution_options(yield_per=batch_size).execute, registration_export_query(semester)
+        )
+        columns = list(result.keys())
+        partitions = result.partitions()
+        if export_format == "csv":
+            yield _render_csv((), header=columns)
+        while True:
+            rows = await run_in_threadpool(next, partitions, None)
+            if rows is None:
+                break
+            exported += len(rows)
+            yield _render_csv(rows) if export_format == "csv" else _render_ndjson(rows, columns)
+    finally:
+        # Also reached when the client disconnects mid-download; closing returns the cursor and connection.
+        connection.close()
+        logger.info(f"Registration export for semester {semester} streamed {exported} rows.")
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from typing import Dict, Optional, Set, Tuple
+
+from app.config.logger import logger
+from app.config.settings import settings
+
+StreamKey = Tuple[int, str]
+
+
+class SeatSubscription:
+    def __init__(self, key: StreamKey, max_pending: int) -> None:
+        self.key = key
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_pending)
+        # Set when the client fell too far behind; it is disconnected and is
+        # expected to reconnect and start again from a fresh snapshot.
+        self.overflowed = False
+
+
+def format_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class SeatBroadcaster:
+    """Fans seat-count changes out to Server-Sent Events subscribers.
+
+    Publishers only record the latest available_seats per course; a single
+    flush task turns everything recorded since the last tick into one event
+    per (semester, course type), encodes it once and hands the same bytes to
+    every subscriber, so a burst of registrations costs one message per
+    client per interval.
+    """
+
+    def __init__(self, flush_interval_seconds: float, max_pending_events: int) -> None:
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending_events = max_pending_events
+        self._subscribers: Dict[StreamKey, Set[SeatSubscription]] = {}
+        self._pending: Dict[StreamKey, Dict[str, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.events_sent = 0
+        self.subscribers_dropped = 0
+
+    def publish(self, semester: int, courses_type: str, course_code: str, available_seats: int) -> None:
+        key = (semester, courses_type)
+        if key in self._subscribers:
+            self._pending.setdefault(key, {})[course_code] = available_seats
+
+    def subscribe(self, semester: int, courses_type: str) -> SeatSubscription:
+        subscription = SeatSubscription((semester, courses_type), self.max_pending_events)
+        self._subscribers.setdefault(subscription.key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SeatSubscription) -> None:
+        subscribers = self._subscribers.get(subscription.key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.key]
+            self._pending.pop(subscription.key, None)
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        for (semester, courses_type), seats in pending.items():
+            payload = format_event("seats", {
+                "semester": semester,
+                "courses_type": courses_type,
+                "available_seats": seats,
+            })
+            for subscription in list(self._subscribers.get((semester, courses_type), ())):
+                try:
+                    subscription.queue.put_nowait(payload)
+                    self.events_sent += 1
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    self.subscribers_dropped += 1
+                    self.unsubscribe(subscription)
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Seat broadcaster flush failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def connection_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connection_count(),
+            "streams": {
+                f"{semester}:{courses_type}": len(subscribers)
+                for (semester, courses_type), subscribers in self._subscribers.items()
+            },
+            "events_sent": self.events_sent,
+            "subscribers_dropped": self.subscribers_dropped,
+        }
+
+
+seat_broadcaster = SeatBroadcaster(
+    flush_interval_seconds=settings.SEAT_STREAM_FLUSH_SECONDS,
+    max_pending_events=settings.SEAT_STREAM_MAX_PENDING_EVENTS,
+)
@@ -0,0 +1,220 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, select, tuple_, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.logger import logger
+from app.config.settings import settings
+from app.models.courses_model import RegisteredCourse
+from app.models.waitlist_model import WaitlistEntry
+from app.repositories.courses_repository import COURSE_TABLES
+from app.repositories.waitlist_repository import OFFERED
+from app.services import seat_reservation
+from app.services.seat_reservation import SeatCount
+
+registered_courses = RegisteredCourse.__table__
+waitlist_entries = WaitlistEntry.__table__
+
+PAPERCODE_COLUMNS = {
+    "VAC": registered_courses.c.vac_papercode,
+    "VOC": registered_courses.c.voc_papercode,
+}
+
+
+@dataclass
+class SeatCorrection:
+    courses_type: str
+    semester: int
+    course_code: str
+    stored: int
+    actual: int
+    total_seats: int
+    applied: bool = False
+
+
+@dataclass
+class ReconciliationReport:
+    dry_run: bool
+    semester: Optional[int]
+    courses_checked: int = 0
+    drifted: int = 0
+    corrected: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    corrections: List[SeatCorrection] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class SeatReconciler:
+    """Recomputes `registered_seats` on the course tables from `registered_courses`.
+
+    A course's true count is its registered_courses rows plus waitlist holds
+    still on offer, since a held seat stays counted until it is claimed or
+    released. Each table is read with one grouped aggregate (a plain SELECT,
+    so it takes no locks), and drifted counters are written back with one
+    UPDATE per batch that only matches rows whose counter still has the value
+    that was read. A counter moved by a concurrent registration is skipped
+    and picked up by the next run, so the job never blocks registration.
+
+    The schedule belongs to a single process: the server lifespan in dev
+    mode, the supervisor in prod mode (workers get an interval of 0).
+    """
+
+    def __init__(self, interval_seconds: float, batch_size: int) -> None:
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.total_corrected = 0
+        self.last_run_drifted = 0
+        self.last_run_corrected = 0
+        self.last_run_seconds = 0.0
+
+    def _actual_counts(self, db, courses_type: str, semester: Optional[int]):
+        courses = COURSE_TABLES[courses_type]
+        papercode = PAPERCODE_COLUMNS[courses_type]
+        registered = (
+            select(papercode.label("course_code"), registered_courses.c.semester, func.count().label("seats"))
+            .group_by(papercode, registered_courses.c.semester)
+            .subquery()
+        )
+        held = (
+            select(waitlist_entries.c.course_code, waitlist_entries.c.semester, func.count().label("seats"))
+            .where(waitlist_entries.c.courses_type == courses_type, waitlist_entries.c.status == OFFERED)
+            .group_by(waitlist_entries.c.course_code, waitlist_entries.c.semester)
+            .subquery()
+        )
+        query = (
+            select(
+                courses.c.course_code,
+                courses.c.semester,
+                courses.c.registered_seats,
+                courses.c.total_seats,
+                (func.coalesce(registered.c.seats, 0) + func.coalesce(held.c.seats, 0)).label("actual"),
+            )
+            .outerjoin(registered, and_(registered.c.course_code == courses.c.course_code,
+                                        registered.c.semester == courses.c.semester))
+            .outerjoin(held, and_(held.c.course_code == courses.c.course_code,
+                                  held.c.semester == courses.c.semester))
+        )
+        if semester is not None:
+            query = query.where(courses.c.semester == semester)
+        return db.execute(query).all()
+
+    def _apply(self, db, courses_type: str, corrections: List[SeatCorrection]) -> None:
+        courses = COURSE_TABLES[courses_type]
+        for start in range(0, len(corrections), self.batch_size):
+            batch = corrections[start:start + self.batch_size]
+            # The stored value is part of the match, so a counter that moved since it was read is left alone.
+            result = db.execute(
+                update(courses)
+                .where(tuple_(courses.c.course_code, courses.c.semester, courses.c.registered_seats).in_(
+                    [(correction.course_code, correction.semester, correction.stored) for correction in batch]
+                ))
+                .values(registered_seats=case(
+                    *((and_(courses.c.course_code == correction.course_code, courses.c.semester == correction.semester),
+                       correction.actual) for correction in batch),
+                    else_=courses.c.registered_seats,
+                ))
+                .returning(courses.c.course_code, courses.c.semester)
+            )
+            applied = {(row.course_code, row.semester) for row in result}
+            db.commit()
+            for correction in batch:
+                correction.applied = (correction.course_code, correction.semester) in applied
+
+    def reconcile(self, dry_run: bool = False, semester: Optional[int] = None) -> ReconciliationReport:
+        started = time.perf_counter()
+        report = ReconciliationReport(dry_run=dry_run, semester=semester)
+        db = SessionLocal()
+        try:
+            for courses_type in COURSE_TABLES:
+                rows = self._actual_counts(db, courses_type, semester)
+                # End the read transaction before writing, so no snapshot is held across the updates.
+                db.commit()
+                report.courses_checked += len(rows)
+                corrections = [
+                    SeatCorrection(courses_type, row.semester, row.course_code, row.registered_seats or 0,
+                                   row.actual, row.total_seats or 0)
+                    for row in rows
+                    if (row.registered_seats or 0) != row.actual
+                ]
+                if corrections and not dry_run:
+                    self._apply(db, courses_type, corrections)
+                report.corrections.extend(corrections)
+        finally:
+            db.close()
+
+        report.drifted = len(report.corrections)
+        report.corrected = sum(correction.applied for correction in report.corrections)
+        report.skipped = report.drifted - report.corrected if not dry_run else 0
+        report.seconds = round(time.perf_counter() - started, 3)
+        if not dry_run:
+            self.runs += 1
+            self.last_run_drifted = report.drifted
+            self.last_run_corrected = report.corrected
+            self.total_corrected += report.corrected
+            self.last_run_seconds = report.seconds
+        if report.drifted:
+            logger.warning(
+                f"Seat reconciliation{' (dry run)' if dry_run else ''} found {report.drifted} drifted counters "
+                f"across {report.courses_checked} courses, corrected {report.corrected}, in {report.seconds:.2f}s."
+            )
+        return report
+
+    async def run_once(self, dry_run: bool = False, semester: Optional[int] = None) -> ReconciliationReport:
+        report = await run_in_threadpool(self.reconcile, dry_run, semester)
+        for correction in report.corrections:
+            if correction.applied:
+                seat_reservation.announce_seat_count(
+                    correction.semester,
+                    correction.courses_type,
+                    SeatCount(correction.course_code, correction.actual, correction.total_seats),
+                )
+        return report
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Seat reconciliation failed: {e}")
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "total_corrected": self.total_corrected,
+            "last_run_drifted": self.last_run_drifted,
+            "last_run_corrected": self.last_run_corrected,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+seat_reconciler = SeatReconciler(
+    interval_seconds=settings.SEAT_RECONCILE_INTERVAL_SECONDS,
+    batch_size=settings.SEAT_RECONCILE_BATCH_SIZE,
+)
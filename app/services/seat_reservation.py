@@ -0,0 +1,69 @@
+from typing import Dict, NamedTuple
+from app.config.database import db
+from app.config.metrics import seat_reservations_total
+from app.repositories import courses_repository
+from app.services.course_catalog import course_catalog
+from app.services.seat_broadcaster import seat_broadcaster
+
+
+class SeatCount(NamedTuple):
+    course_code: str
+    registered_seats: int
+    total_seats: int
+
+    @property
+    def available_seats(self) -> int:
+        return self.total_seats - self.registered_seats
+
+
+class SeatReservationError(Exception):
+    def __init__(self, courses_type: str, course_code: str, message: str) -> None:
+        super().__init__(message)
+        self.courses_type = courses_type
+        self.course_code = course_code
+        self.message = message
+
+
+class CourseFullError(SeatReservationError):
+    def __init__(self, courses_type: str, course_code: str) -> None:
+        super().__init__(courses_type, course_code, f"{courses_type} course {course_code} is full.")
+
+
+class CourseNotFoundError(SeatReservationError):
+    def __init__(self, courses_type: str, course_code: str) -> None:
+        super().__init__(courses_type, course_code, f"{courses_type} course {course_code} does not exist for this semester.")
+
+
+async def reserve_seats(semester: int, course_codes: Dict[str, str]) -> Dict[str, SeatCount]:
+    """Take one seat in every course of `course_codes` ({courses_type: course_code}) or none at all.
+
+    Courses are always locked in (courses_type, course_code) order so two
+    registrations touching the same rows cannot deadlock. Raises a
+    SeatReservationError, after rolling back, if any course has no seat left.
+    When called inside an open transaction the rollback is to a savepoint and
+    the caller is expected to let the error abort its own transaction too.
+    """
+    seat_counts = {}
+    async with db.transaction():
+        for courses_type, course_code in sorted(course_codes.items()):
+            row = await courses_repository.reserve_seat(courses_type, course_code, semester)
+            if row is None:
+                if await courses_repository.course_exists(courses_type, course_code, semester):
+                    seat_reservations_total.inc(courses_type, "full")
+                    raise CourseFullError(courses_type, course_code)
+                seat_reservations_total.inc(courses_type, "not_found")
+                raise CourseNotFoundError(courses_type, course_code)
+            seat_reservations_total.inc(courses_type, "reserved")
+            seat_counts[courses_type] = SeatCount(row["course_code"], row["registered_seats"], row["total_seats"])
+    return seat_counts
+
+
+def announce_seat_count(semester: int, courses_type: str, seat_count: SeatCount) -> None:
+    """Push a committed seat count to the catalog overlay and the live seat stream."""
+    course_catalog.update_seats(semester, courses_type, seat_count.course_code, seat_count.registered_seats)
+    seat_broadcaster.publish(semester, courses_type, seat_count.course_code, seat_count.available_seats)
+
+
+def announce_seat_counts(semester: int, seat_counts: Dict[str, SeatCount]) -> None:
+    for courses_type, seat_count in seat_counts.items():
+        announce_seat_count(semester, courses_type, seat_count)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import jwt
+
+from app.config.logger import logger
+from app.config.settings import settings
+from app.repositories import sessions_repository
+from app.services.session_cache import session_cache
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_LIFETIME = timedelta(days=1)
+
+
+class DatabaseSessionBackend:
+    """Session data lives in the `sessions` table; the cookie holds its key."""
+
+    async def load(self, cookie_value: str) -> Optional[dict]:
+        session_data = session_cache.get(cookie_value)
+        if session_data is not None:
+            return session_data
+        now = datetime.utcnow()
+        session_record = await sessions_repository.get_active_session(cookie_value, now)
+        if session_record is None:
+            return None
+        session_data = dict(session_record["data"])
+        session_cache.set(cookie_value, session_data, ttl_seconds=(session_record["expires"] - now).total_seconds())
+        return session_data
+
+    async def save(self, cookie_value: Optional[str], data: dict) -> str:
+        session_key = cookie_value or str(uuid.uuid4())
+        # Stored as naive IST wall-clock time, as the sessions table always has been.
+        expires = datetime.now(IST).replace(tzinfo=None) + SESSION_LIFETIME
+        await sessions_repository.save_session(session_key, data, expires)
+        session_cache.set(session_key, dict(data))
+        return session_key
+
+    async def delete(self, cookie_value: str) -> None:
+        # Invalidated on both sides of the delete so a concurrent read-through
+        # cannot put the row back into the cache.
+        session_cache.invalidate(cookie_value)
+        try:
+            await sessions_repository.delete_session(cookie_value)
+        finally:
+            session_cache.invalidate(cookie_value)
+
+
+class SignedCookieSessionBackend:
+    """Session data travels in a signed, expiring JWT; nothing is read from the DB.
+
+    Revoked token ids are kept in `revoked_sessions` until the token would
+    have expired anyway. Each worker holds the live deny-list in memory and
+    refreshes it every SESSION_DENYLIST_REFRESH_SECONDS, so a logout on one
+    worker reaches the others within that interval.
+    """
+
+    algorithm = "HS256"
+
+    def __init__(self, signing_key: str) -> None:
+        if not signing_key:
+            raise RuntimeError("SESSION_SIGNING_KEY must be set to use the cookie session backend.")
+        self.signing_key = signing_key
+        self._revoked: set[str] = set()
+        self._refreshed_at = float("-inf")
+        self._refresh_lock = asyncio.Lock()
+
+    def _decode(self, token: str) -> Optional[dict]:
+        try:
+            return jwt.decode(token, self.signing_key, algorithms=[self.algorithm])
+        except jwt.InvalidTokenError:
+            return None
+
+    async def _refresh_revoked(self) -> None:
+        if time.monotonic() - self._refreshed_at < settings.SESSION_DENYLIST_REFRESH_SECONDS:
+            return
+        async with self._refresh_lock:
+            if time.monotonic() - self._refreshed_at < settings.SESSION_DENYLIST_REFRESH_SECONDS:
+                return
+            try:
+                self._revoked = await sessions_repository.list_revoked_session_ids(datetime.utcnow())
+            except Exception as e:
+                logger.error(f"Failed to refresh session deny-list: {e}")
+            self._refreshed_at = time.monotonic()
+
+    async def load(self, cookie_value: str) -> Optional[dict]:
+        claims = self._decode(cookie_value)
+        if claims is None:
+            return None
+        await self._refresh_revoked()
+        if claims.get("jti") in self._revoked:
+            return None
+        return dict(claims.get("data") or {})
+
+    async def save(self, cookie_value: Optional[str], data: dict) -> str:
+        if cookie_value:
+            await self.delete(cookie_value)
+        now = datetime.now(timezone.utc)
+        claims = {
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": now + SESSION_LIFETIME,
+            "data": data,
+        }
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm)
+
+    async def delete(self, cookie_value: str) -> None:
+        claims = self._decode(cookie_value)
+        if claims is None or "jti" not in claims:
+            return
+        self._revoked.add(claims["jti"])
+        expires = datetime.utcfromtimestamp(claims["exp"])
+        await sessions_repository.revoke_session(claims["jti"], expires)
+
+
+def create_session_backend():
+    if settings.SESSION_BACKEND == "database":
+        return DatabaseSessionBackend()
+    if settings.SESSION_BACKEND == "cookie":
+        return SignedCookieSessionBackend(settings.SESSION_SIGNING_KEY)
+    raise RuntimeError(f"Unknown SESSION_BACKEND '{settings.SESSION_BACKEND}'. Must be 'database' or 'cookie'.")
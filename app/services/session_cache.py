@@ -0,0 +1,10 @@
+from app.config.settings import settings
+from app.services.ttl_cache import TTLCache
+
+# Read-through cache of `sessions` rows keyed by session key. Entries never
+# outlive the row's own `expires`; other workers only see a logout once
+# SESSION_CACHE_TTL_SECONDS has passed, so keep the TTL short.
+session_cache = TTLCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.logger import logger
+from app.config.settings import settings
+from app.models.idempotency_model import IdempotencyKey
+from app.models.otp_model import OTPCode
+from app.models.session_model import RevokedSession, SessionData
+
+# (model, key column) per table, in reaping order.
+REAPED_TABLES = (
+    (SessionData, SessionData.session_key),
+    (RevokedSession, RevokedSession.jti),
+    (OTPCode, OTPCode.phone_number),
+    (IdempotencyKey, IdempotencyKey.key),
+)
+
+
+class SessionReaper:
+    """Deletes expired `sessions`, `revoked_sessions`, `otp_codes` and `idempotency_keys` rows in small batches.
+
+    Every batch is its own short transaction and the reaper yields between
+    batches, so it never holds row locks for long while traffic is high.
+    """
+
+    def __init__(self, interval_seconds: float, batch_size: int, batch_pause_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.batch_pause_seconds = batch_pause_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.total_reaped = 0
+        self.last_run_reaped = 0
+        self.last_run_seconds = 0.0
+        self.removed_by_table: Dict[str, int] = {model.__tablename__: 0 for model, _ in REAPED_TABLES}
+        self.last_run_by_table: Dict[str, int] = dict(self.removed_by_table)
+        self.sessions_remaining: Optional[int] = None
+
+    def _delete_batch(self, model, key_column) -> int:
+        db = SessionLocal()
+        try:
+            expired_keys = select(key_column).where(model.expires <= datetime.utcnow()).limit(self.batch_size)
+            result = db.execute(delete(model).where(key_column.in_(expired_keys)))
+            db.commit()
+            return result.rowcount or 0
+        finally:
+            db.close()
+
+    def _count_sessions(self) -> int:
+        db = SessionLocal()
+        try:
+            return db.execute(select(func.count()).select_from(SessionData)).scalar_one()
+        finally:
+            db.close()
+
+    async def _reap(self, model, key_column) -> int:
+        reaped = 0
+        while True:
+            deleted = await run_in_threadpool(self._delete_batch, model, key_column)
+            reaped += deleted
+            if deleted < self.batch_size:
+                return reaped
+            await asyncio.sleep(self.batch_pause_seconds)
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        by_table = {}
+        for model, key_column in REAPED_TABLES:
+            by_table[model.__tablename__] = await self._reap(model, key_column)
+        self.sessions_remaining = await run_in_threadpool(self._count_sessions)
+
+        reaped = sum(by_table.values())
+        self.runs += 1
+        self.last_run_reaped = reaped
+        self.total_reaped += reaped
+        self.last_run_by_table = by_table
+        for table, count in by_table.items():
+            self.removed_by_table[table] += count
+        self.last_run_seconds = time.perf_counter() - started
+        logger.info(
+            f"Expiry reaper removed {reaped} expired rows "
+            f"({', '.join(f'{table}={count}' for table, count in by_table.items())}) "
+            f"in {self.last_run_seconds:.2f}s, {self.sessions_remaining} sessions remaining."
+        )
+        return reaped
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Expiry reaper run failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "total_reaped": self.total_reaped,
+            "last_run_reaped": self.last_run_reaped,
+            "last_run_seconds": self.last_run_seconds,
+            "removed_by_table": dict(self.removed_by_table),
+            "last_run_by_table": dict(self.last_run_by_table),
+            "sessions_remaining": self.sessions_remaining,
+        }
+
+
+session_reaper = SessionReaper(
+    interval_seconds=settings.SESSION_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_REAPER_BATCH_SIZE,
+    batch_pause_seconds=settings.SESSION_REAPER_BATCH_PAUSE_SECONDS,
+)
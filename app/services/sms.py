@@ -0,0 +1,255 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from app.config.logger import logger
+from app.config.settings import settings
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+def normalize_phone_number(phone_number: str, country_code: str = "91") -> Optional[Tuple[str, str]]:
+    digits = re.sub(r'\D', '', phone_number)
+    
+    if digits.startswith(country_code):
+        base_number = digits[len(country_code):]
+    elif digits.startswith('0'):
+        base_number = digits[1:]
+    else:
+        base_number = digits
+
+    if len(base_number) == 10:
+        # Creating the E.164 format
+        e164_format = f"+{country_code}{base_number}"
+        return (base_number, e164_format)
+        
+    return None
+
+
+class SMSDeliveryError(Exception):
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SMSQueueFull(Exception):
+    pass
+
+
+class SMSProvider:
+    name = "base"
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def send(self, to_number: str, body: str) -> None:
+        raise NotImplementedError
+
+
+class TwilioSMSProvider(SMSProvider):
+    """Sends through the Twilio REST API on a pooled aiohttp session.
+
+    aiohttp is imported and the session opened on the first send, so workers
+    that never send an SMS don't pay for either at startup.
+    """
+
+    name = "twilio"
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str) -> None:
+        self.url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+                connector=aiohttp.TCPConnector(limit=settings.SMS_HTTP_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(total=settings.SMS_HTTP_TIMEOUT_SECONDS),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def send(self, to_number: str, body: str) -> None:
+        import aiohttp
+
+        session = self._get_session()
+        data = {"To": to_number, "From": self.from_number, "Body": body}
+        try:
+            async with session.post(self.url, data=data) as response:
+                if response.status < 300:
+                    payload = await response.json()
+                    logger.info(f"Message sent to {to_number} with SID: {payload.get('sid')}")
+                    return
+                text = await response.text()
+                retryable = response.status == 429 or response.status >= 500
+                raise SMSDeliveryError(f"Twilio returned {response.status}: {text}", retryable=retryable)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise SMSDeliveryError(f"Twilio request failed: {e!r}") from e
+
+
+class FakeSMSProvider(SMSProvider):
+    """Keeps messages in memory instead of sending them; for tests and load runs."""
+
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = 0.0, failure_rate: float = 0.0, keep_last: int = 10000) -> None:
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.outbox: Deque[Tuple[str, str]] = deque(maxlen=keep_last)
+
+    async def send(self, to_number: str, body: str) -> None:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise SMSDeliveryError("Simulated provider failure.")
+        self.outbox.append((to_number, body))
+
+    def last_message_to(self, to_number: str) -> Optional[str]:
+        for number, body in reversed(self.outbox):
+            if number == to_number:
+                return body
+        return None
+
+
+@dataclass
+class ProviderMetrics:
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    latency_total_seconds: float = 0.0
+    latency_max_seconds: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def observe(self, seconds: float) -> None:
+        self.latency_total_seconds += seconds
+        self.latency_max_seconds = max(self.latency_max_seconds, seconds)
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        attempts = self.sent + self.failed + self.retries
+        recent = sorted(self.latencies)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "latency_avg_seconds": self.latency_total_seconds / attempts if attempts else 0.0,
+            "latency_p95_seconds": recent[int(len(recent) * 0.95) - 1] if recent else 0.0,
+            "latency_max_seconds": self.latency_max_seconds,
+        }
+
+
+class SMSDispatcher:
+    """Bounded in-process outbound queue drained by a few worker tasks.
+
+    Requests only enqueue; when the queue is full `enqueue` raises
+    SMSQueueFull so the caller can shed load instead of piling up work.
+    Failed sends are retried with full-jitter exponential backoff.
+    """
+
+    def __init__(self, provider: SMSProvider, queue_size: int, workers: int,
+                 max_retries: int, retry_base_seconds: float) -> None:
+        self.provider = provider
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.metrics: Dict[str, ProviderMetrics] = {provider.name: ProviderMetrics()}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def enqueue(self, to_number: str, body: str) -> None:
+        if self._queue is None:
+            raise RuntimeError("SMS dispatcher is not running.")
+        try:
+            self._queue.put_nowait((to_number, body))
+        except asyncio.QueueFull:
+            raise SMSQueueFull("SMS queue is full.")
+
+    async def _deliver(self, to_number: str, body: str) -> None:
+        metrics = self.metrics[self.provider.name]
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                await self.provider.send(to_number, body)
+                metrics.observe(time.perf_counter() - started)
+                metrics.sent += 1
+                return
+            except SMSDeliveryError as e:
+                metrics.observe(time.perf_counter() - started)
+                if not e.retryable or attempt == self.max_retries:
+                    metrics.failed += 1
+                    logger.error(f"Giving up on SMS to {to_number} after {attempt + 1} attempts: {e}")
+                    return
+                metrics.retries += 1
+                await asyncio.sleep(random.uniform(0, self.retry_base_seconds * 2 ** attempt))
+
+    async def _worker(self) -> None:
+        while True:
+            to_number, body = await self._queue.get()
+            try:
+                await self._deliver(to_number, body)
+            except Exception as e:
+                logger.error(f"An unexpected error occurred while sending SMS: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        await self.provider.start()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout_seconds: float = 5.0) -> None:
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.error(f"Dropping {self._queue.qsize()} queued SMS on shutdown.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.provider.close()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "providers": {name: metrics.snapshot() for name, metrics in self.metrics.items()},
+        }
+
+
+def create_sms_provider() -> SMSProvider:
+    if settings.SMS_PROVIDER == "twilio":
+        return TwilioSMSProvider(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_PHONE_NUMBER)
+    if settings.SMS_PROVIDER == "fake":
+        return FakeSMSProvider()
+    raise RuntimeError(f"Unknown SMS_PROVIDER '{settings.SMS_PROVIDER}'. Must be 'twilio' or 'fake'.")
+
+
+sms_dispatcher = SMSDispatcher(
+    provider=create_sms_provider(),
+    queue_size=settings.SMS_QUEUE_SIZE,
+    workers=settings.SMS_WORKERS,
+    max_retries=settings.SMS_MAX_RETRIES,
+    retry_base_seconds=settings.SMS_RETRY_BASE_SECONDS,
+)
@@ -0,0 +1,220 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from app.config.database import db
+from app.config.logger import logger
+from app.config.settings import settings
+from app.repositories import courses_repository, registrations_repository, users_repository, waitlist_repository
+from app.services import seat_reservation
+from app.services.seat_reservation import CourseNotFoundError, SeatCount
+from app.services.sms import SMSQueueFull, normalize_phone_number, sms_dispatcher
+
+
+class WaitlistError(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+@dataclass
+class Promotion:
+    enrollment_number: str
+    semester: int
+    courses_type: str
+    course_code: str
+    hold_expires: datetime
+
+
+class Waitlist:
+    """Per-course queues for full VAC/VOC courses.
+
+    Whenever a seat is released the head of the queue is offered it in the
+    same transaction: the seat stays counted in `registered_seats` and is
+    held for the student until `hold_expires`, when registering for that
+    course claims it. Unclaimed holds are released by a periodic sweep and
+    passed on to the next student. Callers send `notify()` after commit.
+    """
+
+    def __init__(self, hold_seconds: float, sweep_interval_seconds: float, sweep_batch_size: int = 100) -> None:
+        self.hold_seconds = hold_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.sweep_batch_size = sweep_batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.joined = 0
+        self.promoted = 0
+        self.claimed = 0
+        self.expired = 0
+        self.notifications_dropped = 0
+
+    async def join(self, enrollment_number: str, semester: int, courses_type: str, course_code: str) -> None:
+        course = await courses_repository.get_course(courses_type, course_code, semester)
+        if course is None:
+            raise CourseNotFoundError(courses_type, course_code)
+        if (course["registered_seats"] or 0) < (course["total_seats"] or 0):
+            raise WaitlistError(f"{courses_type} course {course_code} has seats available; register for it directly.")
+        if await registrations_repository.get_registered_course(enrollment_number, semester) is not None:
+            raise WaitlistError(f"You are already registered for semester {semester}; drop your courses to join a waitlist.")
+        active = await waitlist_repository.get_active_entry(enrollment_number, semester, courses_type)
+        if active is not None:
+            if active["course_code"] == course_code:
+                return
+            raise WaitlistError(
+                f"You are already on the waitlist for {courses_type} course {active['course_code']}; leave it first."
+            )
+        await waitlist_repository.join(enrollment_number, semester, courses_type, course_code, datetime.utcnow())
+        self.joined += 1
+
+    async def leave(self, enrollment_number: str, semester: int, courses_type: str, course_code: str) -> List[Promotion]:
+        entry = await waitlist_repository.get_entry(enrollment_number, semester, courses_type, course_code)
+        if entry is None or entry["status"] not in waitlist_repository.ACTIVE_STATUSES:
+            raise WaitlistError(f"You are not on the waitlist for {courses_type} course {course_code}.")
+        async with db.transaction():
+            promotion, seat_count = await self._leave_entry(entry)
+        if seat_count is not None:
+            seat_reservation.announce_seat_count(semester, courses_type, seat_count)
+        return [promotion] if promotion is not None else []
+
+    async def leave_all(self, enrollment_number: str, semester: int,
+                        courses_types: Iterable[str]) -> List[Tuple[str, Optional[Promotion], Optional[SeatCount]]]:
+        """Takes the student off every waitlist of `courses_types` they are still on for `semester`.
+
+        Must run inside the caller's transaction. Returns, per released hold,
+        its type and what `release_seat` did with the seat.
+        """
+        released = []
+        for entry in await waitlist_repository.list_active_entries(enrollment_number, semester, courses_types):
+            promotion, seat_count = await self._leave_entry(entry)
+            if promotion is not None or seat_count is not None:
+                released.append((entry["courses_type"], promotion, seat_count))
+        return released
+
+    async def _leave_entry(self, entry) -> Tuple[Optional[Promotion], Optional[SeatCount]]:
+        if not await waitlist_repository.set_status(entry["id"], entry["status"], waitlist_repository.LEFT):
+            return None, None
+        if entry["status"] != waitlist_repository.OFFERED:
+            return None, None
+        return await self.release_seat(entry["courses_type"], entry["course_code"], entry["semester"])
+
+    async def release_seat(self, courses_type: str, course_code: str,
+                           semester: int) -> Tuple[Optional[Promotion], Optional[SeatCount]]:
+        """Hands a freed seat to the head of the queue, or back to the course if nobody waits.
+
+        Must run inside the caller's transaction, so the seat is never free
+        in between and is passed on only if the caller commits. Returns the
+        promotion, or the course's new seat count to announce after commit.
+        """
+        promotion = await self.offer_seat(courses_type, course_code, semester)
+        if promotion is not None:
+            return promotion, None
+        row = await courses_repository.release_seat(courses_type, course_code, semester)
+        if row is None:
+            return None, None
+        return None, SeatCount(row["course_code"], row["registered_seats"], row["total_seats"])
+
+    async def claim_holds(self, enrollment_number: str, semester: int, course_codes: dict) -> List[str]:
+        claimed = await waitlist_repository.claim_holds(enrollment_number, semester, course_codes, datetime.utcnow())
+        self.claimed += len(claimed)
+        return claimed
+
+    async def fill_free_seats(self, semester: int, courses_type: str,
+                              course_codes: Optional[Iterable[str]] = None) -> List[Promotion]:
+        """Offers seats that are free (e.g. after total_seats was raised) to waiting students."""
+        promotions = []
+        for course_code in await waitlist_repository.list_waiting_courses(semester, courses_type, course_codes):
+            while True:
+                async with db.transaction():
+                    if await courses_repository.reserve_seat(courses_type, course_code, semester) is None:
+                        break
+                    promotion = await self.offer_seat(courses_type, course_code, semester)
+                    if promotion is None:
+                        await courses_repository.release_seat(courses_type, course_code, semester)
+                        break
+                promotions.append(promotion)
+        return promotions
+
+    async def expire_holds(self) -> List[Promotion]:
+        promotions = []
+        while True:
+            expired = await waitlist_repository.list_expired_holds(datetime.utcnow(), self.sweep_batch_size)
+            for entry in expired:
+                async with db.transaction():
+                    if not await waitlist_repository.set_status(entry["id"], waitlist_repository.OFFERED, waitlist_repository.EXPIRED):
+                        continue
+                    self.expired += 1
+                    promotion, seat_count = await self.release_seat(entry["courses_type"], entry["course_code"], entry["semester"])
+                if promotion is not None:
+                    promotions.append(promotion)
+                if seat_count is not None:
+                    seat_reservation.announce_seat_count(entry["semester"], entry["courses_type"], seat_count)
+            if len(expired) < self.sweep_batch_size:
+                return promotions
+
+    async def offer_seat(self, courses_type: str, course_code: str, semester: int) -> Optional[Promotion]:
+        """Offers a seat the caller already holds (counted) to the head of the queue, if anyone waits."""
+        hold_expires = datetime.utcnow() + timedelta(seconds=self.hold_seconds)
+        row = await waitlist_repository.offer_next(courses_type, course_code, semester, hold_expires)
+        if row is None:
+            return None
+        self.promoted += 1
+        return Promotion(row["user_enrollment_number"], row["semester"], row["courses_type"], row["course_code"], row["hold_expires"])
+
+    async def notify(self, promotions: Iterable[Promotion]) -> None:
+        hold_minutes = max(1, int(self.hold_seconds // 60))
+        for promotion in promotions:
+            phone_number = await users_repository.get_phone_number(promotion.enrollment_number)
+            normalized = normalize_phone_number(phone_number) if phone_number else None
+            if normalized is None:
+                continue
+            body = (
+                f"A seat in {promotion.courses_type} course {promotion.course_code} is held for you for "
+                f"{hold_minutes} minutes. Complete your course registration to keep it."
+            )
+            try:
+                sms_dispatcher.enqueue(to_number=normalized[1], body=body)
+            except SMSQueueFull:
+                # The offer stands either way; the student also sees it in the waitlist status.
+                self.notifications_dropped += 1
+                logger.error(f"Waitlist notification for {promotion.enrollment_number} dropped, SMS queue is full.")
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                promotions = await self.expire_holds()
+                await self.notify(promotions)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Waitlist sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval_seconds)
+
+    def start(self) -> None:
+        if self.sweep_interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "joined": self.joined,
+            "promoted": self.promoted,
+            "claimed": self.claimed,
+            "expired": self.expired,
+            "notifications_dropped": self.notifications_dropped,
+        }
+
+
+waitlist = Waitlist(
+    hold_seconds=settings.WAITLIST_HOLD_SECONDS,
+    sweep_interval_seconds=settings.WAITLIST_SWEEP_INTERVAL_SECONDS,
+)
@@ -0,0 +1,129 @@
+"""Sync ORM vs async repository access under concurrency.
+
+Runs the same course-list and user lookups that the hot routes perform with
+``--concurrency`` concurrent coroutines in three modes:
+
+* ``sync-on-loop``: blocking ORM calls made directly inside ``async def``
+  (what the routes used to do),
+* ``sync-threadpool``: the same ORM calls pushed to the threadpool,
+* ``async``: the ``app.repositories`` layer on the ``databases`` pool.
+
+Alongside throughput it reports the worst event-loop stall seen by a
+heartbeat task, which is what every other in-flight request waits on.
+
+    python -m benchmarks.bench_data_access --concurrency 50 --operations 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FRONTEND_ORIGIN", "http://localhost")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'fss_bench.db')}")
+os.environ.setdefault("SESSION_SECRET", "session")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "bench")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+10000000000")
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import Base, SessionLocal, db, engine
+from app.models.courses_model import VAC
+from app.models.users_model import User
+from app.repositories import users_repository
+
+SEMESTER = 1
+
+
+def seed(courses, users):
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        if session.query(VAC).filter(VAC.course_code.like("BENCHVAC%")).count() < courses:
+            session.query(VAC).filter(VAC.course_code.like("BENCHVAC%")).delete(synchronize_session=False)
+            session.add_all(
+                VAC(semester=SEMESTER, course_code=f"BENCHVAC{i:04d}", course_name=f"Course {i}",
+                    department_name=f"Department {i % 20}", total_seats=60)
+                for i in range(courses)
+            )
+        if session.query(User).filter(User.enrollment_number.like("BENCH%")).count() < users:
+            session.query(User).filter(User.enrollment_number.like("BENCH%")).delete(synchronize_session=False)
+            session.add_all(
+                User(enrollment_number=f"BENCH{i:06d}", phone_number=f"9{i:09d}", hashed_password="x")
+                for i in range(users)
+            )
+        session.commit()
+    finally:
+        session.close()
+
+
+def sync_operation(i, users):
+    session = SessionLocal()
+    try:
+        session.query(User).filter(User.enrollment_number == f"BENCH{i % users:06d}").first()
+        session.query(VAC).filter(VAC.semester == SEMESTER, VAC.registered_seats < VAC.total_seats).all()
+    finally:
+        session.close()
+
+
+async def async_operation(i, users):
+    await users_repository.get_user_by_enrollment(f"BENCH{i % users:06d}")
+    courses = VAC.__table__
+    await db.fetch_all(
+        select(courses).where(courses.c.semester == SEMESTER, courses.c.registered_seats < courses.c.total_seats)
+    )
+
+
+async def run_mode(mode, concurrency, operations, users):
+    counter = iter(range(operations))
+    worst_stall = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal worst_stall
+        interval = 0.005
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst_stall = max(worst_stall, time.perf_counter() - started - interval)
+
+    async def worker():
+        for i in counter:
+            if mode == "sync-on-loop":
+                sync_operation(i, users)
+            elif mode == "sync-threadpool":
+                await run_in_threadpool(sync_operation, i, users)
+            else:
+                await async_operation(i, users)
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await beat
+    return operations / elapsed, worst_stall * 1000
+
+
+async def main(concurrency, operations, courses, users):
+    seed(courses, users)
+    await db.connect()
+    try:
+        print(f"{'mode':<16} {'ops/s':>10} {'worst loop stall (ms)':>22}")
+        for mode in ("sync-on-loop", "sync-threadpool", "async"):
+            throughput, stall = await run_mode(mode, concurrency, operations, users)
+            print(f"{mode:<16} {throughput:>10.1f} {stall:>22.1f}")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.operations, args.courses, args.users))
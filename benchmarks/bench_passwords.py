@@ -0,0 +1,69 @@
+"""bcrypt login throughput of the password process pool.
+
+Verifies ``--logins`` passwords concurrently through ``PasswordService`` for
+each worker count and prints logins/sec overall and per worker process.
+Also reports how long a 5 ms heartbeat on the event loop was delayed, which
+stays near zero because hashing never runs on the loop.
+
+    python -m benchmarks.bench_passwords --rounds 12 --logins 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("FRONTEND_ORIGIN", "http://localhost")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SESSION_SECRET", "session")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "bench")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+10000000000")
+
+from app.services.passwords import PasswordService, _hash_password
+
+
+async def run(workers, rounds, logins, hashed_password):
+    service = PasswordService(rounds=rounds, workers=workers, max_pending=logins)
+    service.start()
+    # Warm the pool so process start-up is not counted.
+    await asyncio.gather(*(service.verify("password", hashed_password) for _ in range(workers)))
+
+    worst_stall = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal worst_stall
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst_stall = max(worst_stall, time.perf_counter() - started - 0.005)
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(service.verify("password", hashed_password) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await beat
+    service.stop()
+    assert all(verified for verified, _ in results)
+    return logins / elapsed, worst_stall * 1000
+
+
+async def main(rounds, logins, max_workers):
+    hashed_password = _hash_password("password", rounds)
+    print(f"bcrypt cost {rounds}, {logins} logins per run")
+    print(f"{'workers':>7} {'logins/s':>10} {'logins/s/core':>14} {'worst loop stall (ms)':>22}")
+    workers = 1
+    while workers <= max_workers:
+        throughput, stall = await run(workers, rounds, logins, hashed_password)
+        print(f"{workers:>7} {throughput:>10.1f} {throughput / workers:>14.1f} {stall:>22.1f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.logins, args.max_workers))
@@ -0,0 +1,106 @@
+"""Oversell check: hammer one VAC/VOC pair with parallel registrations.
+
+Every attempt reserves a VAC and a VOC seat in one transaction through
+``app.services.seat_reservation``. The run fails loudly if any course ends up
+with more registered seats than it has, or if the number of successful
+reservations does not match the seats handed out.
+
+    python -m benchmarks.bench_seat_reservation --attempts 5000 --seats 120
+
+Point DATABASE_URL at PostgreSQL to exercise real row-level contention; on
+SQLite a few attempts fail with "database is locked" at high concurrency,
+which is reported as errors and never as extra seats.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FRONTEND_ORIGIN", "http://localhost")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'fss_bench.db')}")
+os.environ.setdefault("SESSION_SECRET", "session")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "bench")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+10000000000")
+
+from app.config.database import Base, SessionLocal, db, engine
+from app.models.courses_model import VAC, VOC
+from app.models.users_model import User  # noqa: F401 - registers the users table for the FKs
+from app.services.seat_reservation import CourseFullError, reserve_seats
+
+SEMESTER = 1
+VAC_CODE = "RUSHVAC"
+VOC_CODE = "RUSHVOC"
+
+
+def seed(vac_seats, voc_seats):
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        for model, code, seats in ((VAC, VAC_CODE, vac_seats), (VOC, VOC_CODE, voc_seats)):
+            session.query(model).filter(model.course_code == code).delete()
+            session.add(model(semester=SEMESTER, course_code=code, course_name=code,
+                              department_name="Bench", total_seats=seats, registered_seats=0))
+        session.commit()
+    finally:
+        session.close()
+
+
+def stored_seats():
+    session = SessionLocal()
+    try:
+        return {
+            model.__name__: session.query(model.registered_seats, model.total_seats)
+            .filter(model.course_code == code).one()
+            for model, code in ((VAC, VAC_CODE), (VOC, VOC_CODE))
+        }
+    finally:
+        session.close()
+
+
+async def main(attempts, concurrency, vac_seats, voc_seats):
+    seed(vac_seats, voc_seats)
+    await db.connect()
+    outcomes = {"reserved": 0, "full": 0, "error": 0}
+    attempt_numbers = iter(range(attempts))
+
+    async def worker():
+        for _ in attempt_numbers:
+            try:
+                await reserve_seats(SEMESTER, {"VAC": VAC_CODE, "VOC": VOC_CODE})
+                outcomes["reserved"] += 1
+            except CourseFullError:
+                outcomes["full"] += 1
+            except Exception as e:
+                outcomes["error"] += 1
+                print(f"attempt failed: {e}")
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await db.disconnect()
+    elapsed = time.perf_counter() - started
+
+    seats = stored_seats()
+    print(f"{attempts} attempts in {elapsed:.2f}s ({attempts / elapsed:.0f}/s): {outcomes}")
+    for name, (registered, total) in seats.items():
+        print(f"{name}: registered_seats={registered} total_seats={total}")
+
+    expected = min(vac_seats, voc_seats, attempts)
+    assert outcomes["reserved"] == expected, f"expected {expected} reservations, got {outcomes['reserved']}"
+    for name, (registered, total) in seats.items():
+        assert registered <= total, f"{name} oversold: {registered} > {total}"
+        assert registered == outcomes["reserved"], f"{name} counter {registered} != reservations {outcomes['reserved']}"
+    print("OK: no oversell, counters match reservations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--vac-seats", type=int, default=120)
+    parser.add_argument("--voc-seats", type=int, default=150)
+    args = parser.parse_args()
+    asyncio.run(main(args.attempts, args.concurrency, args.vac_seats, args.voc_seats))
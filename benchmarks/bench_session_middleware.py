@@ -0,0 +1,121 @@
+"""Per-request overhead of the session middleware.
+
+Compares the previous ``BaseHTTPMiddleware`` implementation (reproduced below
+as ``LegacyDBSessionMiddleware``) with the pure ASGI ``DBSessionMiddleware`` on
+an excluded path, an anonymous request and an authenticated request. Besides
+latency it reports SQLAlchemy pool checkouts per request and how many
+connections are still checked out while the route itself runs.
+
+    python -m benchmarks.bench_session_middleware --requests 2000
+
+Needs httpx, which the app itself does not: pip install -r requirements-dev.txt
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FRONTEND_ORIGIN", "http://localhost")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'fss_bench.db')}")
+os.environ.setdefault("SESSION_SECRET", "session")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "bench")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+10000000000")
+
+import httpx
+from sqlalchemy import event
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config.database import Base, SessionLocal, db, engine
+from app.config.settings import settings
+from app.middleware.db_session_middleware import DBSessionMiddleware
+from app.services.session_backends import DatabaseSessionBackend
+from app.models.session_model import SessionData
+from datetime import datetime
+
+
+class LegacyDBSessionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        db = SessionLocal()
+        session_key = request.cookies.get(settings.SESSION_SECRET)
+        request.state.session = {}
+        if session_key:
+            session_record = db.query(SessionData).filter(
+                SessionData.session_key == session_key,
+                SessionData.expires > datetime.utcnow()
+            ).first()
+            if session_record:
+                request.state.session = session_record.data
+        response = await call_next(request)
+        db.close()
+        return response
+
+
+async def health(request):
+    return JSONResponse({"status": "healthy"})
+
+
+held_in_route = []
+
+
+async def me(request):
+    held_in_route.append(engine.pool.checkedout())
+    return JSONResponse(request.state.session)
+
+
+def build_app(middleware_class):
+    app = Starlette(routes=[Route("/health", health), Route("/me", me)])
+    app.add_middleware(middleware_class)
+    return app
+
+
+async def measure(app, path, cookies, requests):
+    checkouts = 0
+
+    def on_checkout(*args):
+        nonlocal checkouts
+        checkouts += 1
+
+    held_in_route.clear()
+    event.listen(engine, "checkout", on_checkout)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+            started = time.perf_counter()
+            for _ in range(requests):
+                await client.get(path)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "checkout", on_checkout)
+    held = sum(held_in_route) / len(held_in_route) if held_in_route else 0.0
+    return elapsed / requests * 1e6, checkouts / requests, held
+
+
+async def main(requests):
+    Base.metadata.create_all(bind=engine)
+    await db.connect()
+    await DatabaseSessionBackend().save("bench-session", {"enrollment_number": "BENCH0001"})
+    cookies = {settings.SESSION_SECRET: "bench-session"}
+
+    cases = [
+        ("excluded /health", "/health", {}),
+        ("anonymous /me", "/me", {}),
+        ("authenticated /me", "/me", cookies),
+    ]
+    print(f"{'case':<20} {'middleware':<10} {'us/req':>10} {'checkouts/req':>14} {'held in route':>14}")
+    for label, path, case_cookies in cases:
+        for name, middleware_class in (("legacy", LegacyDBSessionMiddleware), ("asgi", DBSessionMiddleware)):
+            per_request, checkouts, held = await measure(build_app(middleware_class), path, case_cookies, requests)
+            print(f"{label:<20} {name:<10} {per_request:>10.1f} {checkouts:>14.2f} {held:>14.2f}")
+    await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,464 @@
+"""Registration-rush load test: the full student flow against a real server.
+
+Seeds a database with existing students (``User`` + ``Registration`` rows,
+some already holding seats) and a few hundred VAC/VOC courses, starts the
+API with ``python run.py prod`` on it, then has ``--students`` new students
+go through send-otp, create-user, login-user, user-details, courses-list
+(VAC and VOC), user-courses and complete-registration-data, at most
+``--concurrency`` of them at a time.
+
+SMS goes through the fake provider and the OTP store is the database, so
+the harness reads each code straight from ``otp_codes``. Afterwards every
+course is checked for oversell (more registered seats than total seats)
+and for counters that disagree with the ``registered_courses`` rows.
+Throughput, per-step p50/p95/p99 latency, status codes and error rates are
+written to a JSON result file.
+
+    python -m benchmarks.registration_rush --students 2000 --concurrency 100
+
+With ``--url`` an already running server is used instead; it has to share
+DATABASE_URL with the harness and run with SMS_PROVIDER=fake and
+OTP_STORE=database. SQLite serialises writers, so point DATABASE_URL at
+PostgreSQL (and raise ``--workers``) for numbers that mean anything.
+
+Needs httpx, which the app itself does not: pip install -r requirements-dev.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+os.environ.setdefault("FRONTEND_ORIGIN", "http://localhost")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'fss_rush.db')}")
+os.environ.setdefault("SESSION_SECRET", "session")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "bench")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+10000000000")
+
+import aiohttp
+from sqlalchemy import func, insert, select
+
+from app.config.database import Base, SessionLocal, engine
+from app.config.migrations import run_migrations
+from app.config.settings import settings
+from app.models.courses_model import VAC, VOC, RegisteredCourse
+from app.models.otp_model import OTPCode
+from app.models.users_model import Registration, User
+from app.services.passwords import _hash_password
+
+ROOT = Path(__file__).resolve().parent.parent
+COURSE_MODELS = {"VAC": VAC, "VOC": VOC}
+EXPECTED_STATUS = {
+    "send-otp": {200},
+    "create-user": {201},
+    "login-user": {200},
+    "user-details": {200},
+    "courses-list": {200},
+    "user-courses": {200, 409},  # 409 is a full course, not an error
+    "complete-registration-data": {200},
+}
+PASSWORD = "rush-password"
+DEPARTMENTS = ["Physics", "Chemistry", "Mathematics", "English", "History", "Commerce", "Computer Science", "Economics"]
+PROGRAMMES = ["B.Sc.", "B.A.", "B.Com.", "B.Tech."]
+
+
+def insert_chunks(session, table, rows, chunk_size=5000):
+    for start in range(0, len(rows), chunk_size):
+        session.execute(insert(table), rows[start:start + chunk_size])
+
+
+def seed(args):
+    """Existing students, courses sized so the rush runs them out, and seat counters that match."""
+    if engine.url.get_backend_name() == "sqlite" or args.reset:
+        Base.metadata.drop_all(bind=engine)
+    run_migrations()
+
+    rng = random.Random(args.seed)
+    # Seats already taken by seeded students plus `seat_ratio` free seats per rushing student.
+    capacity = int(args.existing * args.prefilled + args.students * args.seat_ratio)
+    seats_per_course = max(1, -(-capacity // args.courses))
+    hashed_password = _hash_password(PASSWORD, settings.BCRYPT_ROUNDS)
+
+    session = SessionLocal()
+    try:
+        courses = {}
+        for courses_type, model in COURSE_MODELS.items():
+            courses[courses_type] = [
+                {
+                    "semester": args.semester,
+                    "course_code": f"{courses_type}{index:04d}",
+                    "course_name": f"{rng.choice(DEPARTMENTS)} {courses_type} {index}",
+                    "department_name": rng.choice(DEPARTMENTS),
+                    "total_seats": seats_per_course,
+                    "registered_seats": 0,
+                }
+                for index in range(args.courses)
+            ]
+
+        users, registrations, registered = [], [], []
+        for index in range(args.existing):
+            enrollment_number = f"SEED{index:07d}"
+            users.append({
+                "enrollment_number": enrollment_number,
+                "phone_number": f"9{index:09d}",
+                "hashed_password": hashed_password,
+            })
+            registrations.append({
+                "name": f"Student {index}",
+                "registration_status": "Partial",
+                "abc_id": f"ABC{index:09d}",
+                "user_enrollment_number": enrollment_number,
+                "faculty_number": f"SEEDF{index:07d}",
+                "gender": rng.choice(["M", "F"]),
+                "programme_name": rng.choice(PROGRAMMES),
+                "major_allotted_subject": rng.choice(DEPARTMENTS),
+                "minor_allotted_subject": rng.choice(DEPARTMENTS),
+                "generic_allotted_subject": rng.choice(DEPARTMENTS),
+            })
+            if rng.random() < args.prefilled:
+                picks = {}
+                for courses_type, rows in courses.items():
+                    open_courses = [row for row in rows if row["registered_seats"] < row["total_seats"]]
+                    if open_courses:
+                        picks[courses_type] = rng.choice(open_courses)
+                if len(picks) == len(COURSE_MODELS):
+                    for row in picks.values():
+                        row["registered_seats"] += 1
+                    registrations[-1]["registration_status"] = "Completed"
+                    registered.append({
+                        "user_enrollment_number": enrollment_number,
+                        "semester": args.semester,
+                        "vac": picks["VAC"]["course_name"],
+                        "vac_papercode": picks["VAC"]["course_code"],
+                        "voc": picks["VOC"]["course_name"],
+                        "voc_papercode": picks["VOC"]["course_code"],
+                    })
+
+        for courses_type, model in COURSE_MODELS.items():
+            insert_chunks(session, model.__table__, courses[courses_type])
+        insert_chunks(session, User.__table__, users)
+        insert_chunks(session, Registration.__table__, registrations)
+        insert_chunks(session, RegisteredCourse.__table__, registered)
+        session.commit()
+    finally:
+        session.close()
+
+    return {
+        "existing_students": args.existing,
+        "existing_registered": len(registered),
+        "courses_per_type": args.courses,
+        "seats_per_course": seats_per_course,
+        "free_seats_per_type": args.courses * seats_per_course - len(registered),
+    }
+
+
+def read_otp(phone_number):
+    session = SessionLocal()
+    try:
+        return session.execute(select(OTPCode.code).where(OTPCode.phone_number == phone_number)).scalar()
+    finally:
+        session.close()
+
+
+def verify_seat_counters(semester):
+    """Oversell and drift check: counters vs. total seats and vs. registered_courses rows."""
+    session = SessionLocal()
+    try:
+        report = {"oversold": [], "counter_mismatches": []}
+        for courses_type, model in COURSE_MODELS.items():
+            papercode = RegisteredCourse.vac_papercode if courses_type == "VAC" else RegisteredCourse.voc_papercode
+            actual = dict(session.execute(
+                select(papercode, func.count())
+                .where(RegisteredCourse.semester == semester)
+                .group_by(papercode)
+            ).all())
+            for code, registered_seats, total_seats in session.execute(
+                select(model.course_code, model.registered_seats, model.total_seats).where(model.semester == semester)
+            ):
+                if registered_seats > total_seats:
+                    report["oversold"].append({"courses_type": courses_type, "course_code": code,
+                                               "registered_seats": registered_seats, "total_seats": total_seats})
+                if registered_seats != actual.get(code, 0):
+                    report["counter_mismatches"].append({"courses_type": courses_type, "course_code": code,
+                                                         "registered_seats": registered_seats,
+                                                         "registrations": actual.get(code, 0)})
+        report["passed"] = not report["oversold"] and not report["counter_mismatches"]
+        return report
+    finally:
+        session.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.outcomes = Counter()
+
+    def observe(self, step, seconds, status):
+        self.latencies[step].append(seconds)
+        self.statuses[step][str(status)] += 1
+        if status not in EXPECTED_STATUS[step]:
+            self.errors[step] += 1
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def call(http, recorder, step, method, url, **kwargs):
+    started = time.perf_counter()
+    try:
+        async with http.request(method, url, **kwargs) as response:
+            body = await response.read()
+            status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        recorder.observe(step, time.perf_counter() - started, type(e).__name__)
+        return None, None
+    recorder.observe(step, time.perf_counter() - started, status)
+    return status, body
+
+
+async def student_flow(base_url, connector, recorder, index, args, run_tag, rng):
+    api = f"{base_url}/v1/api"
+    phone_number = f"7{run_tag}{index:06d}"
+    enrollment_number = f"RUSH{run_tag}{index:06d}"
+    # One session per student so each keeps its own cookie; the connection pool is shared.
+    async with aiohttp.ClientSession(connector=connector, connector_owner=False,
+                                     cookie_jar=aiohttp.CookieJar(unsafe=True),
+                                     timeout=aiohttp.ClientTimeout(total=args.timeout)) as http:
+        status, _ = await call(http, recorder, "send-otp", "POST", f"{api}/auth/send-otp",
+                               json={"phone_number": phone_number})
+        if status != 200:
+            return "send_otp_failed"
+        otp = await asyncio.to_thread(read_otp, phone_number)
+
+        status, _ = await call(http, recorder, "create-user", "POST", f"{api}/auth/create-user", json={
+            "enrollment_number": enrollment_number, "phone_number": phone_number, "otp": otp or "", "password": PASSWORD,
+        })
+        if status != 201:
+            return "create_user_failed"
+
+        status, _ = await call(http, recorder, "login-user", "POST", f"{api}/auth/login-user",
+                               json={"enrollment_number": enrollment_number, "password": PASSWORD})
+        if status != 200:
+            return "login_failed"
+
+        status, _ = await call(http, recorder, "user-details", "POST", f"{api}/register/user-details", json={
+            "name": f"Rush Student {index}", "abc_id": f"RABC{run_tag}{index:06d}",
+            "faculty_number": f"RF{run_tag}{index:06d}", "gender": rng.choice(["M", "F"]),
+            "programme_name": rng.choice(PROGRAMMES), "major_allotted_subject": rng.choice(DEPARTMENTS),
+            "minor_allotted_subject": rng.choice(DEPARTMENTS), "generic_allotted_subject": rng.choice(DEPARTMENTS),
+        })
+        if status != 200:
+            return "user_details_failed"
+
+        for attempt in range(args.attempts):
+            choice = {}
+            for courses_type in COURSE_MODELS:
+                status, body = await call(http, recorder, "courses-list", "POST", f"{api}/courses/courses-list",
+                                          json={"semester": args.semester, "courses_type": courses_type})
+                if status != 200:
+                    return "courses_list_failed"
+                open_courses = [course for course in json.loads(body) if course["available_seats"] > 0]
+                if not open_courses:
+                    return "no_seats_left"
+                # Demand is skewed: a few courses are much more popular than the rest.
+                choice[courses_type] = open_courses[min(int(rng.paretovariate(1.2)) - 1, len(open_courses) - 1)]
+
+            status, _ = await call(http, recorder, "user-courses", "POST", f"{api}/register/user-courses", json={
+                "semester": args.semester,
+                "vac": choice["VAC"]["name"], "vac_papercode": choice["VAC"]["papercode"],
+                "voc": choice["VOC"]["name"], "voc_papercode": choice["VOC"]["papercode"],
+            })
+            if status == 200:
+                break
+            if status != 409:
+                return "user_courses_failed"
+        else:
+            return "course_full"
+
+        status, _ = await call(http, recorder, "complete-registration-data", "GET",
+                               f"{api}/register/complete-registration-data")
+        return "registered" if status == 200 else "registration_data_failed"
+
+
+async def rush(base_url, args):
+    recorder = Recorder()
+    run_tag = f"{random.Random().randrange(1000):03d}"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+
+    async def one(index):
+        async with semaphore:
+            rng = random.Random(f"{args.seed}-{index}")
+            outcome = await student_flow(base_url, connector, recorder, index, args, run_tag, rng)
+            recorder.outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(args.students)))
+    finally:
+        await connector.close()
+    return recorder, time.perf_counter() - started
+
+
+def summarise(recorder, elapsed):
+    steps = {}
+    total_requests = total_errors = 0
+    for step in EXPECTED_STATUS:
+        ordered = sorted(recorder.latencies.get(step, []))
+        count, errors = len(ordered), recorder.errors[step]
+        total_requests += count
+        total_errors += errors
+        steps[step] = {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "statuses": dict(recorder.statuses[step]),
+            "mean_ms": round(sum(ordered) * 1000 / count, 2) if count else None,
+            **{
+                f"p{int(fraction * 100)}_ms": round(percentile(ordered, fraction) * 1000, 2) if count else None
+                for fraction in (0.5, 0.95, 0.99)
+            },
+            "max_ms": round(ordered[-1] * 1000, 2) if count else None,
+        }
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": total_requests,
+        "requests_per_second": round(total_requests / elapsed, 2) if elapsed else None,
+        "registrations_per_second": round(recorder.outcomes["registered"] / elapsed, 2) if elapsed else None,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "outcomes": dict(recorder.outcomes),
+        "steps": steps,
+    }
+
+
+def start_server(args, log_path):
+    env = dict(
+        os.environ,
+        SMS_PROVIDER="fake",
+        OTP_STORE="database",
+        ADMISSION_ENABLED="false",
+        AUTO_MIGRATE="false",
+        BCRYPT_ROUNDS=str(settings.BCRYPT_ROUNDS),
+    )
+    command = [sys.executable, "run.py", "prod", "--host", "127.0.0.1", "--port", str(args.port),
+               "--workers", str(args.workers), "--max-requests", "0", "--no-access-log", "--log-level", "warning"]
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    return process, log_file
+
+
+async def wait_until_healthy(base_url, timeout_seconds=60):
+    deadline = time.monotonic() + timeout_seconds
+    async with aiohttp.ClientSession() as http:
+        while time.monotonic() < deadline:
+            try:
+                async with http.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout_seconds}s")
+
+
+def stop_server(process, log_file):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    log_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--students", type=int, default=1000, help="new students going through the flow")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--existing", type=int, default=20000, help="students seeded before the rush")
+    parser.add_argument("--prefilled", type=float, default=0.5, help="share of seeded students already holding seats")
+    parser.add_argument("--courses", type=int, default=300, help="courses per type (VAC and VOC)")
+    parser.add_argument("--seat-ratio", type=float, default=0.9, help="free seats per type / rushing students")
+    parser.add_argument("--attempts", type=int, default=3, help="course picks a student tries before giving up")
+    parser.add_argument("--semester", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables (always done on SQLite)")
+    parser.add_argument("--url", help="use a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes when starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="result file (default: registration-rush-<timestamp>.json in the temp dir)")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.existing} students and {args.courses} courses per type...")
+    seeded_at = time.perf_counter()
+    seeded = seed(args)
+    seeded["seconds"] = round(time.perf_counter() - seeded_at, 2)
+    print(f"  {seeded}")
+
+    server = None
+    base_url = args.url.rstrip("/") if args.url else f"http://127.0.0.1:{args.port}"
+    server_log = os.path.join(tempfile.gettempdir(), f"registration-rush-server-{uuid.uuid4().hex[:8]}.log")
+    if not args.url:
+        server = start_server(args, server_log)
+    try:
+        asyncio.run(wait_until_healthy(base_url))
+        print(f"Rushing {args.students} students at concurrency {args.concurrency} against {base_url}...")
+        recorder, elapsed = asyncio.run(rush(base_url, args))
+    finally:
+        if server is not None:
+            stop_server(*server)
+
+    result = {
+        "benchmark": "registration_rush",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items()},
+        "database": engine.url.get_backend_name(),
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "seed": seeded,
+        "run": summarise(recorder, elapsed),
+        "seat_check": verify_seat_counters(args.semester),
+    }
+    if server is not None:
+        result["server_log"] = server_log
+
+    output = args.output or os.path.join(
+        tempfile.gettempdir(), f"registration-rush-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    run = result["run"]
+    print(f"{run['requests']} requests in {run['elapsed_seconds']}s "
+          f"({run['requests_per_second']} req/s, {run['registrations_per_second']} registrations/s), "
+          f"error rate {run['error_rate']:.2%}")
+    print(f"{'step':<28}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, stats in run["steps"].items():
+        print(f"{step:<28}{stats['requests']:>9}{stats['errors']:>8}"
+              f"{stats['p50_ms'] or 0:>10}{stats['p95_ms'] or 0:>10}{stats['p99_ms'] or 0:>10}")
+    print(f"Outcomes: {run['outcomes']}")
+    check = result["seat_check"]
+    print(f"Seat check {'passed' if check['passed'] else 'FAILED'}: "
+          f"{len(check['oversold'])} oversold, {len(check['counter_mismatches'])} counter mismatches")
+    print(f"Result written to {output}")
+    if not check["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
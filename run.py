@@ -1,55 +1,340 @@
-import subprocess
-import threading
-import sys
-import os
-from colorama import init as colorama_init
-from dotenv import load_dotenv
-
-load_dotenv()
-colorama_init()
-port = os.getenv("ENV_PORT", "8000")
-# ANSI colors
-COLORS = {
-    "api": "\033[96m",     # cyan
-    "reset": "\033[0m"
-}
-
-def stream_output(process, name, color):
-    for line in iter(process.stdout.readline, b''):
-        sys.stdout.write(f"{color}[{name}]{COLORS['reset']} {line.decode(errors='replace')}")
-    process.stdout.close()
-
-def run_concurrently():
-    try:
-        api_cmd = [
-            "uvicorn",
-            "app.main:app",
-            "--reload",
-            "--log-level", "debug",
-            "--port", port
-        ]
-
-        print("...Starting API and Worker...\n")
-
-        # Starting processes
-        api_proc = subprocess.Popen(api_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-
-        # Starting threaded output streaming
-        threading.Thread(target=stream_output, args=(api_proc, "api", COLORS["api"]), daemon=True).start()
-
-        api_proc.wait()
-
-    except KeyboardInterrupt:
-        print("\nShutting down processes...")
-
-        if api_proc and api_proc.poll() is None:
-            api_proc.terminate()
-            try:
-                api_proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                api_proc.kill()
-
-        print("Clean exit.")
-
-if __name__ == "__main__":
-    run_concurrently()
+import argparse
+import importlib.util
+import json
+import logging
+import multiprocessing
+import random
+import signal
+import subprocess
+import threading
+import sys
+import os
+import time
+import uvicorn
+from colorama import init as colorama_init
+from dotenv import load_dotenv
+
+load_dotenv()
+colorama_init()
+port = os.getenv("ENV_PORT", "8000")
+host = os.getenv("ENV_HOST", "0.0.0.0")
+# ANSI colors
+COLORS = {
+    "api": "\033[96m",     # cyan
+    "reset": "\033[0m"
+}
+
+logger = logging.getLogger("uvicorn.error")
+
+def stream_output(process, name, color):
+    for line in iter(process.stdout.readline, b''):
+        sys.stdout.write(f"{color}[{name}]{COLORS['reset']} {line.decode(errors='replace')}")
+    process.stdout.close()
+
+def run_concurrently():
+    try:
+        api_cmd = [
+            "uvicorn",
+            "app.main:app",
+            "--reload",
+            "--log-level", "debug",
+            "--port", port
+        ]
+
+        print("...Starting API and Worker...\n")
+
+        # Starting processes
+        api_proc = subprocess.Popen(api_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        # Starting threaded output streaming
+        threading.Thread(target=stream_output, args=(api_proc, "api", COLORS["api"]), daemon=True).start()
+
+        api_proc.wait()
+
+    except KeyboardInterrupt:
+        print("\nShutting down processes...")
+
+        if api_proc and api_proc.poll() is None:
+            api_proc.terminate()
+            try:
+                api_proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                api_proc.kill()
+
+        print("Clean exit.")
+
+def pick_implementation(preferred, fallback):
+    return preferred if importlib.util.find_spec(preferred) is not None else fallback
+
+class ReadyServer(uvicorn.Server):
+    """uvicorn Server that tells the supervisor once it is accepting connections."""
+
+    def __init__(self, config, ready):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        self.ready.send(True)
+        self.ready.close()
+
+def serve_worker(config, max_requests_jitter, sockets, ready):
+    # Spawned children don't re-run Config.__init__, so logging has to be set up here
+    config.configure_logging()
+    # Each worker gets its own recycling threshold so they don't all restart at once
+    if config.limit_max_requests and max_requests_jitter:
+        config.limit_max_requests += random.randint(0, max_requests_jitter)
+    ReadyServer(config, ready).run(sockets=sockets)
+
+class WorkerSupervisor:
+    """Pre-fork supervisor for production.
+
+    The listening socket is bound once here and shared with every worker.
+    Workers that exit (crash, or recycling after --max-requests) are replaced,
+    SIGHUP performs a rolling restart that brings each replacement up before
+    draining the worker it replaces, and SIGINT/SIGTERM drain all workers.
+    """
+
+    def __init__(self, config, workers, max_requests_jitter, ready_timeout=60):
+        self.config = config
+        self.workers = workers
+        self.max_requests_jitter = max_requests_jitter
+        self.ready_timeout = ready_timeout
+        self.context = multiprocessing.get_context("spawn")
+        self.sockets = []
+        self.processes = []
+        self.should_exit = threading.Event()
+        self.restart_requested = threading.Event()
+
+    def spawn(self):
+        ready, child_ready = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=serve_worker,
+            args=(self.config, self.max_requests_jitter, self.sockets, child_ready),
+            daemon=False,
+        )
+        process.start()
+        child_ready.close()
+        logger.info(f"Started worker [{process.pid}]")
+        return process, ready
+
+    def stop(self, process):
+        if process.is_alive():
+            process.terminate()
+        process.join(self.config.timeout_graceful_shutdown or None)
+        if process.is_alive():
+            logger.warning(f"Worker [{process.pid}] did not stop in time, killing it")
+            process.kill()
+            process.join()
+
+    def rolling_restart(self):
+        logger.info("Rolling restart of all workers")
+        for idx, (process, ready) in enumerate(list(self.processes)):
+            if self.should_exit.is_set():
+                return
+            new_process, new_ready = self.spawn()
+            if not self.wait_ready(new_ready):
+                logger.error(f"Worker [{new_process.pid}] did not become ready, keeping [{process.pid}]")
+                self.stop(new_process)
+                new_ready.close()
+                continue
+            self.processes[idx] = (new_process, new_ready)
+            self.stop(process)
+            ready.close()
+
+    def wait_ready(self, ready):
+        try:
+            return ready.poll(self.ready_timeout) and ready.recv()
+        except EOFError:
+            # The worker exited before it finished starting up
+            return False
+
+    def keep_alive(self):
+        for idx, (process, ready) in enumerate(self.processes):
+            if process.is_alive() or self.should_exit.is_set():
+                continue
+            process.join()
+            ready.close()
+            logger.info(f"Worker [{process.pid}] exited with code {process.exitcode}, replacing it")
+            self.processes[idx] = self.spawn()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGINT, lambda sig, frame: self.should_exit.set())
+        signal.signal(signal.SIGTERM, lambda sig, frame: self.should_exit.set())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda sig, frame: self.restart_requested.set())
+
+    def run(self):
+        self.sockets = [self.config.bind_socket()]
+        self.install_signal_handlers()
+        logger.info(f"Supervisor [{os.getpid()}] starting {self.workers} worker(s)")
+        try:
+            self.processes = [self.spawn() for _ in range(self.workers)]
+            while not self.should_exit.wait(0.5):
+                if self.restart_requested.is_set():
+                    self.restart_requested.clear()
+                    self.rolling_restart()
+                self.keep_alive()
+        finally:
+            logger.info("Shutting down workers...")
+            for process, _ in self.processes:
+                if process.is_alive():
+                    process.terminate()
+            for process, _ in self.processes:
+                self.stop(process)
+            for sock in self.sockets:
+                sock.close()
+            logger.info(f"Supervisor [{os.getpid()}] stopped")
+
+def reconcile_seats_periodically(interval_seconds, stop):
+    # One schedule for the whole host instead of one per worker
+    from app.services.seat_reconciler import seat_reconciler
+    while not stop.wait(interval_seconds):
+        try:
+            seat_reconciler.reconcile()
+        except Exception as e:
+            logger.error(f"Seat reconciliation failed: {e}")
+
+def run_production(args):
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=pick_implementation("uvloop", "asyncio"),
+        http=pick_implementation("httptools", "h11"),
+        log_level=args.log_level,
+        access_log=args.access_log,
+        use_colors=False,
+        proxy_headers=True,
+        limit_max_requests=args.max_requests or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
+    if args.migrate:
+        # Once, before forking: workers racing to CREATE TABLE on a fresh database would fail startup.
+        from app.config.database import engine
+        from app.config.migrations import run_migrations
+        run_migrations()
+        engine.dispose()
+    from app.config.settings import settings
+    reconcile_interval = settings.SEAT_RECONCILE_INTERVAL_SECONDS
+    # Spawned workers read settings from the environment, so this keeps them from migrating again,
+    # lets them size their password pools for the number of workers and leaves the seat
+    # reconciliation schedule to the supervisor.
+    os.environ["AUTO_MIGRATE"] = "false"
+    os.environ["WEB_CONCURRENCY"] = str(max(1, args.workers))
+    os.environ["SEAT_RECONCILE_INTERVAL_SECONDS"] = "0"
+
+    logger.info(
+        f"Serving on {config.host}:{config.port} "
+        f"(loop={config.loop}, http={config.http}, max_requests={args.max_requests or 'unlimited'})"
+    )
+    supervisor = WorkerSupervisor(config, max(1, args.workers), args.max_requests_jitter)
+    if reconcile_interval > 0:
+        threading.Thread(
+            target=reconcile_seats_periodically, args=(reconcile_interval, supervisor.should_exit), daemon=True
+        ).start()
+    supervisor.run()
+
+def run_migrate(args):
+    from app.config.migrations import run_migrations
+    run_migrations()
+    print("Migrations complete.")
+
+def run_allot(args):
+    from app.services.allotment import AllotmentError, run_allotment
+    try:
+        report = run_allotment(args.semester, dry_run=args.dry_run, order=args.order, seed=args.seed)
+    except AllotmentError as e:
+        sys.exit(f"Allotment failed: {e}")
+    print(json.dumps(report.as_dict(), indent=2))
+
+def run_reconcile_seats(args):
+    from app.services.seat_reconciler import seat_reconciler
+    report = seat_reconciler.reconcile(dry_run=args.dry_run, semester=args.semester)
+    print(json.dumps(report.as_dict(), indent=2))
+
+def run_startup_report(args):
+    # A fresh interpreter, so the numbers match what a newly scaled-out worker pays
+    probe = (
+        "import json; from app.config.startup_timing import probe_cold_start; "
+        "print('STARTUP_REPORT ' + json.dumps(probe_cold_start()))"
+    )
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        sys.exit(result.returncode)
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    timings = {}
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_REPORT "):
+            timings = json.loads(line[len("STARTUP_REPORT "):])
+
+    print(f"Slowest imports (top {args.top}, cumulative / self):")
+    for cumulative_us, self_us, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms {self_us / 1000:9.1f} ms  {name}")
+    print(f"\nTotal import time: {sum(m[1] for m in modules) / 1000:.1f} ms across {len(modules)} modules")
+    print("Startup phases (seconds since app import began):")
+    for name, seconds in timings.items():
+        print(f"  {name:<14} {seconds:.3f}")
+    print(f"Process wall time including interpreter start and shutdown: {wall_seconds:.3f}s")
+    print("(-X importtime adds some overhead, so absolute numbers run slightly high.)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the FSS backend API.")
+    parser.add_argument("mode", nargs="?",
+                        choices=["dev", "prod", "migrate", "startup-report", "allot", "reconcile-seats"], default="dev",
+                        help="dev runs a single auto-reloading server, prod pre-forks workers, migrate creates "
+                             "missing tables and indexes, startup-report measures cold start, allot assigns "
+                             "seats from submitted preferences, reconcile-seats recomputes registered_seats counters")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=int(port))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "10000")),
+                        help="recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+                        help="random extra requests per worker so recycling is staggered")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="seconds a stopping worker gets to finish in-flight requests")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--migrate", action=argparse.BooleanOptionalAction, default=True,
+                        help="prod: create missing tables and indexes once before starting workers")
+    parser.add_argument("--top", type=int, default=25, help="startup-report: number of slowest imports to list")
+    parser.add_argument("--semester", type=int, help="allot: semester to allot seats for; reconcile-seats: "
+                                                     "limit to one semester")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="allot, reconcile-seats: compute and report without writing")
+    parser.add_argument("--order", choices=["random", "submitted"], default="random",
+                        help="allot: serve students in lottery order or by submission time")
+    parser.add_argument("--seed", type=int, help="allot: lottery seed, for a reproducible order")
+    args = parser.parse_args()
+    if args.mode == "allot" and args.semester is None:
+        parser.error("allot requires --semester")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.mode == "prod":
+        run_production(args)
+    elif args.mode == "migrate":
+        run_migrate(args)
+    elif args.mode == "startup-report":
+        run_startup_report(args)
+    elif args.mode == "allot":
+        run_allot(args)
+    elif args.mode == "reconcile-seats":
+        run_reconcile_seats(args)
+    else:
+        run_concurrently()